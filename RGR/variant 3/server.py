@@ -2,7 +2,11 @@ import socket
 import json
 import random
 import os
+import sys
 import threading
+
+# Общая библиотека crypt_lib лежит в корне репозитория
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 import crypt_lib
 
 # Конфигурация
@@ -12,16 +16,24 @@ DB_FILE = 'users_db.json'
 ROUNDS = 20
 PRIME_BITS = 128
 
-# Генерация N с использованием crypt_lib
-print(">>> Генерация параметров системы (может занять время)...")
-p = crypt_lib.generate_prime_bits(PRIME_BITS)
-q = crypt_lib.generate_prime_bits(PRIME_BITS)
-# Убедимся, что p != q
-while p == q:
-    q = crypt_lib.generate_prime_bits(PRIME_BITS)
+N = None
+
+def generate_system_params():
+    """
+    Генерирует N = p*q. Простые p и q берутся из пула crypt_lib.PrimePool:
+    два процесса пула ищут их одновременно.
+    """
+    print(">>> Генерация параметров системы (может занять время)...")
+    with crypt_lib.PrimePool(prime_bits=(PRIME_BITS,), capacity=2, workers=2, use_processes=True) as pool:
+        p = pool.get_prime(PRIME_BITS)
+        q = pool.get_prime(PRIME_BITS)
+        # Убедимся, что p != q
+        while p == q:
+            q = pool.get_prime(PRIME_BITS)
 
-N = p * q
-print(f">>> Параметры сгенерированы. N имеет длину {N.bit_length()} бит.")
+    n = p * q
+    print(f">>> Параметры сгенерированы. N имеет длину {n.bit_length()} бит.")
+    return n
 
 def load_users():
     if not os.path.exists(DB_FILE):
@@ -131,4 +143,5 @@ def start_server():
         thread.start()
 
 if __name__ == "__main__":
+    N = generate_system_params()
     start_server()
\ No newline at end of file
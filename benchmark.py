@@ -0,0 +1,489 @@
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import timeit
+
+import crypt_lib as cl
+import primality
+import rsa
+
+def legacy_fast_exp_mod(a, x, p):
+    """Прежняя реализация fast_exp_mod (бинарный метод справа налево)."""
+    y = 1
+    s = a % p
+    while x > 0:
+        if x % 2 == 1:
+            y = (y * s) % p
+        x = x // 2
+        s = (s * s) % p
+    return y
+
+
+
+def _time_per_call(func, budget=0.2):
+    """Среднее время одного вызова func (в секундах) за примерно budget секунд."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * budget / 0.2))
+    return min(timer.repeat(repeat=3, number=number)) / number
+
+
+
+def bench_fast_exp_mod(sizes=(16, 64, 256, 512, 1024, 2048)):
+    """
+    Сравнивает реализации возведения в степень по модулю для разных битностей
+    и показывает, какую из них выбирает cl.fast_exp_mod.
+    """
+    print(f"{'бит':>6} {'бинарный, мкс':>15} {'окно, мкс':>12} {'pow, мкс':>10}  выбор")
+    for bits in sizes:
+        p = random.getrandbits(bits) | (1 << (bits - 1)) | 1
+        a = random.randrange(2, p)
+        x = random.getrandbits(bits) | (1 << (bits - 1))
+
+        t_legacy = _time_per_call(lambda: legacy_fast_exp_mod(a, x, p))
+        t_window = _time_per_call(lambda: cl.sliding_window_exp_mod(a, x, p))
+        t_pow = _time_per_call(lambda: pow(a, x, p))
+
+        print(f"{bits:>6} {t_legacy * 1e6:>15.1f} {t_window * 1e6:>12.1f} {t_pow * 1e6:>10.1f}  {cl.exp_mod_backend(a, x, p)}")
+
+
+
+def bench_multi_exp_mod(sizes=((128, 64), (256, 128), (1024, 160), (1024, 256), (2048, 256))):
+    """
+    Сравнивает cl.multi_exp_mod с двумя отдельными вызовами pow
+    для пар (битность модуля, битность показателей).
+    """
+    print(f"{'модуль':>7} {'показатель':>11} {'2 x pow, мкс':>13} {'Штраус, мкс':>12}")
+    for p_bits, e_bits in sizes:
+        p = random.getrandbits(p_bits) | (1 << (p_bits - 1)) | 1
+        a, b = random.randrange(2, p), random.randrange(2, p)
+        u1, u2 = random.getrandbits(e_bits), random.getrandbits(e_bits)
+
+        t_pow = _time_per_call(lambda: pow(a, u1, p) * pow(b, u2, p) % p)
+        t_multi = _time_per_call(lambda: cl.multi_exp_mod((a, b), (u1, u2), p))
+
+        print(f"{p_bits:>7} {e_bits:>11} {t_pow * 1e6:>13.1f} {t_multi * 1e6:>12.1f}")
+
+
+
+def bench_primality(sizes=(128, 256, 512, 1024)):
+    """
+    Сравнивает тест Ферма (50 раундов) с is_probable_prime на случайных
+    нечетных кандидатах (как при поиске простого) и на простых числах.
+    """
+    print(f"{'бит':>6} {'Ферма, кандидат':>16} {'MR, кандидат':>13} {'Ферма, простое':>15} {'MR, простое':>12} {'BPSW, простое':>14}  (мкс)")
+    for bits in sizes:
+        candidates = [random.getrandbits(bits) | (1 << (bits - 1)) | 1 for _ in range(200)]
+        prime = cl.generate_prime_bits(bits)
+
+        t_fermat = _time_per_call(lambda: [cl.fermat_primality_test(n) for n in candidates]) / len(candidates)
+        t_mr = _time_per_call(lambda: [primality.is_probable_prime(n) for n in candidates]) / len(candidates)
+        t_fermat_p = _time_per_call(lambda: cl.fermat_primality_test(prime))
+        t_mr_p = _time_per_call(lambda: primality.is_probable_prime(prime))
+        t_bpsw_p = _time_per_call(lambda: primality.is_probable_prime(prime, bpsw=True))
+
+        print(f"{bits:>6} {t_fermat * 1e6:>16.1f} {t_mr * 1e6:>13.1f} {t_fermat_p * 1e6:>15.1f} {t_mr_p * 1e6:>12.1f} {t_bpsw_p * 1e6:>14.1f}")
+
+
+
+def legacy_generate_prime_bits(bits):
+    """Прежний поиск простого: новое случайное число на каждую попытку."""
+    while True:
+        num = random.randint(2**(bits-1), 2**bits - 1)
+        if primality.is_probable_prime(num):
+            return num
+
+
+
+def bench_prime_search(sizes=(128, 256, 512, 1024), runs=20):
+    """
+    Сравнивает поиск простого по решету (cl.generate_prime_bits)
+    с прежним циклом случайных попыток. Время - среднее по runs запускам.
+    """
+    print(f"{'бит':>6} {'цикл randint, мс':>17} {'решето, мс':>11}")
+    for bits in sizes:
+        t_legacy = timeit.timeit(lambda: legacy_generate_prime_bits(bits), number=runs) / runs
+        t_sieve = timeit.timeit(lambda: cl.generate_prime_bits(bits), number=runs) / runs
+        print(f"{bits:>6} {t_legacy * 1e3:>17.1f} {t_sieve * 1e3:>11.1f}")
+
+
+
+def legacy_generate_safe_prime(min_val, max_val):
+    """Прежний поиск безопасного простого: случайное q, затем проверка 2q + 1."""
+    while True:
+        q_candidate = random.randint(min_val // 2, max_val // 2)
+        if primality.is_probable_prime(q_candidate):
+            p_candidate = 2 * q_candidate + 1
+            if primality.is_probable_prime(p_candidate):
+                return p_candidate, q_candidate
+
+
+
+def bench_safe_prime(sizes=(128, 256, 512), runs=5):
+    """
+    Сравнивает совместное просеивание q и 2q + 1 (cl.generate_safe_prime)
+    с прежним поиском безопасного простого.
+    """
+    print(f"{'бит':>6} {'прежний, мс':>12} {'решето, мс':>11}")
+    for bits in sizes:
+        lo, hi = 2**(bits-1), 2**bits - 1
+        t_legacy = timeit.timeit(lambda: legacy_generate_safe_prime(lo, hi), number=runs) / runs
+        t_sieve = timeit.timeit(lambda: cl.generate_safe_prime(lo, hi), number=runs) / runs
+        print(f"{bits:>6} {t_legacy * 1e3:>12.1f} {t_sieve * 1e3:>11.1f}")
+
+
+
+def legacy_extended_euclidean_algorithm(a, b):
+    """Прежняя рекурсивная реализация обобщенного алгоритма Евклида."""
+    if a == 0:
+        return b, 0, 1
+    gcd, x1, y1 = legacy_extended_euclidean_algorithm(b % a, a)
+    return gcd, y1 - (b // a) * x1, x1
+
+
+
+def bench_xgcd(sizes=(64, 256, 1024, 2048, 4096)):
+    """
+    Сравнивает вычисление обратного элемента: рекурсивный алгоритм Евклида,
+    итеративный с шагами Лемера (cl.extended_euclidean_algorithm)
+    и встроенный pow(x, -1, m), который использует cl.mod_inverse.
+    """
+    print(f"{'бит':>6} {'рекурсивный, мкс':>17} {'итеративный, мкс':>16} {'pow(x, -1, m), мкс':>19}")
+    for bits in sizes:
+        m = cl.generate_prime_bits(bits)
+        x = random.randrange(2, m)
+
+        try:
+            t_rec = f"{_time_per_call(lambda: legacy_extended_euclidean_algorithm(x, m)) * 1e6:.1f}"
+        except RecursionError:
+            t_rec = "RecursionError"
+        t_iter = _time_per_call(lambda: cl.extended_euclidean_algorithm(x, m))
+        t_pow = _time_per_call(lambda: pow(x, -1, m))
+
+        print(f"{bits:>6} {t_rec:>17} {t_iter * 1e6:>16.1f} {t_pow * 1e6:>19.1f}")
+
+
+
+def bench_group_generation(sizes=(128, 256, 512), runs=3):
+    """
+    Сравнивает генерацию группы (p, g) по безопасному простому и по
+    структурированному простому p = b*q + 1 со случайным поиском корня.
+    """
+    print(f"{'бит':>6} {'безопасное, мс':>15} {'структурированное, мс':>22}")
+    for bits in sizes:
+        lo, hi = 2**(bits-1), 2**bits - 1
+
+        def safe_group():
+            p, q = cl.generate_safe_prime(lo, hi)
+            return cl.find_primitive_root(p, q)
+
+        def structured_group():
+            p, q, factors = cl.generate_structured_prime(lo, hi)
+            return cl.find_primitive_root(p, factors=factors, randomized=True)
+
+        t_safe = timeit.timeit(safe_group, number=runs) / runs
+        t_structured = timeit.timeit(structured_group, number=runs) / runs
+        print(f"{bits:>6} {t_safe * 1e3:>15.1f} {t_structured * 1e3:>22.1f}")
+
+
+
+def bench_multiprime_rsa(sizes=(2048, 3072), prime_counts=(2, 3, 4)):
+    """
+    Сравнивает закрытую операцию RSA (подпись, расшифрование) для модулей
+    из 2, 3 и 4 простых одного размера с возведением в степень d по модулю n.
+    """
+    print(f"{'бит':>6} {'простых':>8} {'pow(c, d, n), мс':>17} {'КТО, мс':>9} {'ускорение':>10}")
+    for bits in sizes:
+        for count in prime_counts:
+            key = rsa.rsa_generate_key_bits(bits, count)
+            c = random.randrange(2, key.n)
+            t_pow = _time_per_call(lambda: pow(c, key.d, key.n))
+            t_crt = _time_per_call(lambda: key.pow(c))
+            print(f"{bits:>6} {count:>8} {t_pow * 1e3:>17.2f} {t_crt * 1e3:>9.2f} {t_pow / t_crt:>10.1f}")
+
+
+
+# Бюджет холодного запуска main.py: время импорта сверх запуска пустого
+# интерпретатора, в миллисекундах
+STARTUP_BUDGET_MS = 50
+
+# Модули, время импорта которых показывает bench_startup
+STARTUP_MODULES = ('main', 'crypt_lib', 'rsa', 'elgamal', 'gost', 'fips', 'bsgs')
+
+
+
+def _cold_start_time(code, runs):
+    """Минимальное время запуска нового интерпретатора с python -c code, в секундах."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+
+def bench_startup(modules=STARTUP_MODULES, runs=5, budget_ms=STARTUP_BUDGET_MS):
+    """
+    Измеряет время холодного импорта модулей (каждый раз в новом процессе)
+    за вычетом запуска пустого интерпретатора.
+
+    Returns:
+        bool: True, если импорт main укладывается в budget_ms.
+    """
+    base = _cold_start_time('pass', runs)
+    print(f"Запуск пустого интерпретатора: {base * 1e3:.1f} мс")
+    print(f"{'модуль':>10} {'импорт, мс':>11}")
+    within_budget = True
+    for module in modules:
+        t = (_cold_start_time(f'import {module}', runs) - base) * 1e3
+        mark = ""
+        if module == 'main' and t > budget_ms:
+            within_budget = False
+            mark = f"  превышен бюджет {budget_ms} мс"
+        print(f"{module:>10} {t:>11.1f}{mark}")
+    return within_budget
+
+
+
+# Битности операндов для набора run_suite
+SUITE_SIZES = (16, 32, 64, 128, 256, 512, 1024, 2048)
+
+# Поиск безопасного простого для find_primitive_root выше этой битности
+# занимает минуты, поэтому эти размеры пропускаются
+SAFE_PRIME_MAX_BITS = 512
+
+# Порог регрессии по умолчанию: медиана выросла более чем на 10%
+REGRESSION_THRESHOLD = 0.10
+
+# Минимальная длительность одного замера: быстрые операции повторяются
+# внутри замера, чтобы не мерить накладные расходы perf_counter
+MIN_SAMPLE_TIME = 1e-3
+
+
+
+def _percentile(sorted_values, pct):
+    """Перцентиль pct (0-100) отсортированного списка методом ближайшего ранга."""
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[rank - 1]
+
+
+
+def _measure(op, inputs, budget, min_samples, max_samples):
+    """
+    Замеряет op(*args) на входах inputs (по кругу), пока не истечет budget
+    секунд, но не меньше min_samples и не больше max_samples замеров.
+
+    Returns:
+        dict: ops_per_sec (по медиане), среднее и перцентили времени одной
+              операции в микросекундах, число замеров и повторов в замере.
+    """
+
+    start = time.perf_counter()
+    op(*inputs[0])
+    first = time.perf_counter() - start
+    inner = max(1, int(MIN_SAMPLE_TIME / first)) if first > 0 else 1000
+
+    samples = []
+    deadline = time.perf_counter() + budget
+    i = 0
+    while len(samples) < max_samples and (len(samples) < min_samples or time.perf_counter() < deadline):
+        args = inputs[i % len(inputs)]
+        i += 1
+        start = time.perf_counter()
+        for _ in range(inner):
+            op(*args)
+        samples.append((time.perf_counter() - start) / inner)
+
+    samples.sort()
+    p50 = _percentile(samples, 50)
+    return {
+        'ops_per_sec': 1 / p50 if p50 > 0 else float('inf'),
+        'mean_us': sum(samples) / len(samples) * 1e6,
+        'p50_us': p50 * 1e6,
+        'p90_us': _percentile(samples, 90) * 1e6,
+        'p99_us': _percentile(samples, 99) * 1e6,
+        'samples': len(samples),
+        'inner': inner,
+    }
+
+
+
+def _random_odd(bits):
+    return random.getrandbits(bits) | (1 << (bits - 1)) | 1
+
+
+
+def _suite_cases(bits, count):
+    """
+    Операции набора для битности bits: (имя, функция, список аргументов).
+    Для каждой операции готовится count разных входов.
+    """
+
+    cases = []
+
+    p = _random_odd(bits)
+    cases.append(('fast_exp_mod', cl.fast_exp_mod,
+                  [(random.randrange(2, p), _random_odd(bits), p) for _ in range(count)]))
+
+    primes = [cl.generate_prime_bits(bits) for _ in range(min(count, 4))]
+    cases.append(('fermat_primality_test', cl.fermat_primality_test, [(n,) for n in primes]))
+    cases.append(('is_probable_prime', primality.is_probable_prime, [(n,) for n in primes]))
+    cases.append(('mod_inverse', cl.mod_inverse,
+                  [(random.randrange(2, m), m) for m in primes for _ in range(max(1, count // len(primes)))]))
+
+    cases.append(('generate_prime_bits', cl.generate_prime_bits, [(bits,)]))
+
+    if 8 <= bits <= SAFE_PRIME_MAX_BITS:
+        p, q = cl.generate_safe_prime(2**(bits-1), 2**bits - 1)
+        cases.append(('find_primitive_root', cl.find_primitive_root, [(p, q)]))
+
+    return cases
+
+
+
+def run_suite(sizes=SUITE_SIZES, budget=0.5, min_samples=5, max_samples=2000, seed=1, only=None):
+    """
+    Прогоняет набор замеров операций crypt_lib для всех битностей sizes.
+
+    Входные данные генерируются от фиксированного seed, поэтому повторные
+    запуски измеряют одни и те же числа.
+
+    Args:
+        sizes (iterable): Битности операндов.
+        budget (float): Время на одну операцию одной битности, в секундах.
+        min_samples (int): Минимальное число замеров (даже если budget истек).
+        max_samples (int): Максимальное число замеров.
+        seed (int): Начальное значение генератора входных данных.
+        only (iterable): Имена операций, которые нужно замерить (по умолчанию все).
+
+    Returns:
+        dict: {'meta': {...}, 'results': {"операция/битность": замер}}.
+    """
+
+    random.seed(seed)
+    only = set(only) if only else None
+    results = {}
+    for bits in sizes:
+        for name, op, inputs in _suite_cases(bits, 16):
+            if only is not None and name not in only:
+                continue
+            results[f"{name}/{bits}"] = _measure(op, inputs, budget, min_samples, max_samples)
+            print(f"{name + '/' + str(bits):>28} {results[f'{name}/{bits}']['ops_per_sec']:>14.1f} оп/с",
+                  file=sys.stderr)
+    random.seed()
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'seed': seed,
+            'budget': budget,
+        },
+        'results': results,
+    }
+
+
+
+def compare_to_baseline(report, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Сравнивает замеры с базовыми по медиане времени операции.
+
+    Args:
+        report (dict): Результат run_suite.
+        baseline (dict): Сохраненный ранее результат run_suite.
+        threshold (float): Допустимый относительный рост медианы.
+
+    Returns:
+        list: Регрессии [(ключ, базовая медиана, текущая медиана, отношение)],
+              отсортированные по убыванию отношения.
+    """
+
+    regressions = []
+    for key, current in report['results'].items():
+        base = baseline.get('results', {}).get(key)
+        if base is None or base['p50_us'] <= 0:
+            continue
+        ratio = current['p50_us'] / base['p50_us']
+        if ratio > 1 + threshold:
+            regressions.append((key, base['p50_us'], current['p50_us'], ratio))
+    regressions.sort(key=lambda r: r[3], reverse=True)
+    return regressions
+
+
+
+def run_legacy_comparisons():
+    """Таблицы сравнения новых реализаций с прежними."""
+    bench_fast_exp_mod()
+    print()
+    bench_multi_exp_mod()
+    print()
+    bench_primality()
+    print()
+    bench_prime_search()
+    print()
+    bench_safe_prime()
+    print()
+    bench_xgcd()
+    print()
+    bench_group_generation()
+    print()
+    bench_multiprime_rsa()
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры производительности crypt_lib.")
+    sub = parser.add_subparsers(dest='command')
+    sub.add_parser('compare', help="таблицы сравнения с прежними реализациями (по умолчанию)")
+    startup = sub.add_parser('startup', help="время холодного импорта main.py и модулей алгоритмов")
+    startup.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS,
+                         help="допустимое время импорта main, мс")
+    startup.add_argument('--runs', type=int, default=5)
+    suite = sub.add_parser('suite', help="набор замеров с отчетом JSON и сравнением с базовым")
+    suite.add_argument('--sizes', type=int, nargs='+', default=list(SUITE_SIZES), help="битности операндов")
+    suite.add_argument('--only', nargs='+', help="замерить только эти операции")
+    suite.add_argument('--budget', type=float, default=0.5, help="секунд на одну операцию одной битности")
+    suite.add_argument('--min-samples', type=int, default=5)
+    suite.add_argument('--seed', type=int, default=1)
+    suite.add_argument('--output', '-o', help="файл для отчета JSON (по умолчанию stdout)")
+    suite.add_argument('--baseline', help="файл с базовым отчетом для сравнения")
+    suite.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                       help="допустимый рост медианы (0.1 = 10%%)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'startup':
+        return 0 if bench_startup(runs=args.runs, budget_ms=args.budget_ms) else 1
+    if args.command != 'suite':
+        run_legacy_comparisons()
+        return 0
+
+    report = run_suite(args.sizes, args.budget, args.min_samples, seed=args.seed, only=args.only)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.threshold)
+        if regressions:
+            print(f"\nРегрессии (порог {args.threshold:.0%}):", file=sys.stderr)
+            for key, base, current, ratio in regressions:
+                print(f"  {key:>28}: {base:.1f} -> {current:.1f} мкс (x{ratio:.2f})", file=sys.stderr)
+            return 1
+        print(f"\nРегрессий нет (порог {args.threshold:.0%}).", file=sys.stderr)
+    return 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
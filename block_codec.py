@@ -0,0 +1,193 @@
+import array
+import functools
+import sys
+
+# Размер порции файла, читаемой за раз (округляется до кратного размеру блока)
+CHUNK_SIZE = 1 << 20
+
+# Наибольшая ширина блока (в байтах), которую numpy разбирает целиком:
+# блок помещается в 64-битное целое
+NUMPY_MAX_WIDTH = 8
+
+# Коды array для ширин, совпадающих с размером машинного целого
+_ARRAY_CODES = {array.array(code).itemsize: code for code in 'QLIHB'}
+
+
+
+@functools.lru_cache(maxsize=None)
+def numpy_or_none():
+    """
+    Модуль numpy, если он установлен, иначе None. Импортируется при первом
+    обращении, чтобы не замедлять импорт модулей с шифрами.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+
+def read_chunks(f_in, block_size, chunk_size=CHUNK_SIZE):
+    """
+    Читает файл большими порциями в один переиспользуемый буфер.
+
+    Порции кратны block_size, кроме, возможно, последней. Каждая порция -
+    memoryview на общий буфер: она действительна только до следующей
+    итерации, поэтому данные нужно обработать или скопировать сразу.
+
+    Yields:
+        memoryview: Очередная порция.
+    """
+    size = max(block_size, chunk_size - chunk_size % block_size)
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    while True:
+        n = 0
+        while n < size:
+            read = f_in.readinto(view[n:])
+            if not read:
+                break
+            n += read
+        if not n:
+            break
+        yield view[:n]
+        if n < size:
+            break
+
+
+
+def decode_blocks(data, width):
+    """
+    Разбирает данные на числа big-endian ширины width байт; длина data
+    должна быть кратна width.
+
+    Блоки до NUMPY_MAX_WIDTH байт разбираются numpy целиком, без numpy -
+    через array для ширин 1, 2, 4 и 8; остальные - по одному через
+    int.from_bytes по срезам memoryview.
+
+    Returns:
+        numpy.ndarray, array или list: Последовательность чисел.
+    """
+    numpy = numpy_or_none()
+    if numpy is not None and width <= NUMPY_MAX_WIDTH:
+        if width in (1, 2, 4, 8):
+            return numpy.frombuffer(data, dtype=f'>u{width}')
+        raw = numpy.frombuffer(data, dtype=numpy.uint8).reshape(-1, width)
+        padded = numpy.zeros((len(raw), 8), dtype=numpy.uint8)
+        padded[:, 8 - width:] = raw
+        return padded.view('>u8').ravel()
+    if width in _ARRAY_CODES:
+        values = array.array(_ARRAY_CODES[width])
+        values.frombytes(data)
+        if width > 1 and sys.byteorder == 'little':
+            values.byteswap()
+        return values
+    view = memoryview(data)
+    return [int.from_bytes(view[i:i + width], byteorder='big') for i in range(0, len(view), width)]
+
+
+
+def decode_ints(data, width):
+    """
+    decode_blocks, возвращающий list из int; неполный последний блок
+    разбирается как число из оставшихся байт.
+    """
+    whole = len(data) - len(data) % width
+    values = decode_blocks(data[:whole], width)
+    values = values if isinstance(values, list) else values.tolist()
+    if whole < len(data):
+        values.append(int.from_bytes(data[whole:], byteorder='big'))
+    return values
+
+
+
+def encode_blocks(values, width):
+    """
+    Записывает числа блоками big-endian ширины width байт.
+
+    Raises:
+        OverflowError: Если число не помещается в width байт.
+    """
+    numpy = numpy_or_none()
+    if numpy is not None and width <= NUMPY_MAX_WIDTH:
+        values = numpy.asarray(values, dtype=numpy.uint64)
+        if len(values) and int(values.max()) >> (8 * width):
+            raise OverflowError('int too big to convert')
+        if width in (1, 2, 4, 8):
+            return values.astype(f'>u{width}').tobytes()
+        return values.astype('>u8').view(numpy.uint8).reshape(-1, 8)[:, 8 - width:].tobytes()
+    if width in _ARRAY_CODES:
+        out = array.array(_ARRAY_CODES[width], values)
+        if width > 1 and sys.byteorder == 'little':
+            out.byteswap()
+        return out.tobytes()
+    return b''.join([value.to_bytes(width, byteorder='big') for value in values])
+
+
+
+def encode_into(values, width, out):
+    """
+    Записывает числа блоками ширины width в начало заранее выделенного
+    буфера out (bytearray не короче len(values) * width).
+
+    Returns:
+        int: Число записанных байт.
+    """
+    n = len(values) * width
+    with memoryview(out) as view:
+        if width <= NUMPY_MAX_WIDTH:
+            view[:n] = encode_blocks(values, width)
+        else:
+            for offset, value in zip(range(0, n, width), values):
+                view[offset:offset + width] = value.to_bytes(width, byteorder='big')
+    return n
+
+
+
+def process_file(input_path, output_path, block_size_in, block_size_out, process,
+                 original_size=None, drop_tail=False):
+    """
+    Поблочное преобразование файла порциями.
+
+    Файл читается порциями в переиспользуемый буфер (read_chunks), блоки
+    каждой порции разбираются целиком (decode_ints), process получает
+    список чисел порции и возвращает список чисел результата (их может быть
+    больше, например пара (a, b) на блок у Эль-Гамаля). Результат
+    записывается в буфер, выделенный один раз на файл.
+
+    Args:
+        input_path (str): Путь к входному файлу.
+        output_path (str): Путь к выходному файлу.
+        block_size_in (int): Размер входного блока (в байтах).
+        block_size_out (int): Размер выходного блока (в байтах).
+        process (callable): process(list[int]) -> list[int].
+        original_size (int): Если задан, в файл записывается не больше
+            original_size байт; у последнего блока остаются младшие байты.
+        drop_tail (bool): Отбрасывать неполный последний входной блок.
+
+    Raises:
+        OSError: Ошибки чтения и записи.
+        OverflowError: Если результат не помещается в block_size_out байт.
+    """
+    out = bytearray()
+    remaining = original_size
+    with open(input_path, 'rb') as f_in, open(output_path, 'wb') as f_out:
+        for chunk in read_chunks(f_in, block_size_in):
+            if drop_tail:
+                chunk = chunk[:len(chunk) - len(chunk) % block_size_in]
+            values = process(decode_ints(chunk, block_size_in))
+            if len(out) < len(values) * block_size_out:
+                out = bytearray(len(values) * block_size_out)
+            n = encode_into(values, block_size_out, out)
+            with memoryview(out) as view:
+                if remaining is None:
+                    f_out.write(view[:n])
+                    continue
+                full = min(n, remaining - remaining % block_size_out)
+                f_out.write(view[:full])
+                remaining -= full
+                if full < n and remaining:
+                    # Последний блок: только младшие remaining байт
+                    f_out.write(view[full + block_size_out - remaining:full + block_size_out])
+                    remaining = 0
@@ -48,7 +48,7 @@ def get_bsgs_input_from_keyboard():
     """
     try:
         p = int(input("Введите простой модуль p: "))
-        if not cl.fermat_primality_test(p):
+        if not cl.is_probable_prime(p, bpsw=True):
             print(f"Предупреждение: {p} не является вероятно простым числом.")
         a = int(input(f"Введите основание a (1 < a < {p-1}): "))
         y = int(input(f"Введите результат y (1 < y < {p-1}): "))
@@ -64,12 +64,7 @@ def generate_bsgs_parameters(min_p=100000, max_p=10000000):
     Генерация параметров a, y, p для задачи дискретного логарифма.
     """
     print("Генерация параметров...")
-    p = 0
-    while True:
-        num = random.randint(min_p, max_p)
-        if cl.fermat_primality_test(num):
-            p = num
-            break
+    p = cl.generate_prime_range(min_p, max_p)
             
     a = random.randint(2, p - 2)
     x_true = random.randint(2, p - 2)
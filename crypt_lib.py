@@ -1,6 +1,147 @@
 import random
 import math
-import hashlib
+import array
+import collections
+import functools
+import itertools
+import os
+import queue
+import threading
+
+import block_codec
+import hashing
+import primality
+from block_codec import decode_blocks, encode_blocks
+from primality import is_probable_prime
+
+def _window_width(bits):
+    """
+    Подбирает ширину окна для скользящего окна по длине показателя степени.
+    Границы взяты из классической оценки числа умножений (HAC, табл. 14.16).
+    """
+    if bits <= 24:
+        return 1
+    if bits <= 80:
+        return 3
+    if bits <= 240:
+        return 4
+    if bits <= 672:
+        return 5
+    return 6
+
+
+
+def sliding_window_recode(x, k=None):
+    """
+    Перекодирует показатель степени для метода скользящего окна.
+
+    Биты x просматриваются от старшего к младшему, каждое окно длиной
+    не более k бит заканчивается единицей, поэтому все цифры нечетные.
+    
+    Args:
+        x (int): Неотрицательный показатель степени.
+        k (int): Ширина окна (по умолчанию подбирается по битности x).
+    
+    Returns:
+        list: Список пар (squarings, digit): перед умножением на a^digit
+              результат нужно squarings раз возвести в квадрат.
+              Последняя пара может иметь digit = 0 (только возведения в квадрат).
+    """
+
+    if x == 0:
+        return []
+    if k is None:
+        k = _window_width(x.bit_length())
+    bits = bin(x)[2:]
+    n = len(bits)
+    recoding = []
+    squarings = 0
+    i = 0
+    while i < n:
+        if bits[i] == '0':
+            squarings += 1
+            i += 1
+            continue
+        j = min(i + k, n)
+        while bits[j - 1] == '0':
+            j -= 1
+        squarings += j - i
+        recoding.append((squarings, int(bits[i:j], 2)))
+        squarings = 0
+        i = j
+    if squarings:
+        recoding.append((squarings, 0))
+    return recoding
+
+
+
+def _odd_powers(a, p, max_digit):
+    """Таблица нечетных степеней a^1, a^3, ..., a^max_digit по модулю p."""
+    s = a % p
+    table = [s]
+    s2 = (s * s) % p
+    for _ in range(max_digit // 2):
+        table.append((table[-1] * s2) % p)
+    return table
+
+
+
+def _exp_by_recoding(a, recoding, p):
+    """Вычисляет степень по уже перекодированному показателю."""
+    if not recoding:
+        return 1 % p
+    max_digit = max(digit for _, digit in recoding)
+    table = _odd_powers(a, p, max_digit)
+    y = table[recoding[0][1] >> 1]
+    for squarings, digit in recoding[1:]:
+        for _ in range(squarings):
+            y = (y * y) % p
+        if digit:
+            y = (y * table[digit >> 1]) % p
+    return y
+
+
+
+def sliding_window_exp_mod(a, x, p, k=None):
+    """
+    Возведение в степень по модулю методом скользящего окна (на чистом Python).
+
+    По сравнению с бинарным методом сокращает число умножений с ~n/2
+    до ~n/(k+1) ценой таблицы из 2^(k-1) нечетных степеней основания.
+    Работает с любыми типами, поддерживающими * и %.
+    
+    Args:
+        a (int): Основание
+        x (int): Неотрицательный показатель степени
+        p (int): Модуль
+        k (int): Ширина окна (по умолчанию подбирается по битности x)
+    
+    Returns:
+        int: Результат вычисления a^x mod p
+    """
+
+    return _exp_by_recoding(a, sliding_window_recode(x, k), p)
+
+
+
+def exp_mod_backend(a, x, p):
+    """
+    Возвращает имя реализации, которую выберет fast_exp_mod для операндов.
+
+    Встроенный pow(a, x, p) написан на C и на CPython быстрее любой
+    реализации на Python при всех размерах операндов (см. benchmark.py),
+    поэтому для целых чисел всегда выбирается он. Скользящее окно
+    используется для прочих типов, у которых нет трехаргументного pow.
+    
+    Returns:
+        str: 'pow' или 'window'.
+    """
+
+    if type(a) is int and type(x) is int and type(p) is int:
+        return 'pow'
+    return 'window'
+
+
 
 def fast_exp_mod(a, x, p):
     """
@@ -15,20 +156,437 @@ def fast_exp_mod(a, x, p):
         int: Результат вычисления a^x mod p
     """
 
+    if type(a) is int and type(x) is int and type(p) is int:
+        return pow(a, x, p)
+    return sliding_window_exp_mod(a, x, p)
+
+
+
+class ModContext:
+    """
+    Контекст для многократного возведения в степень с фиксированными
+    модулем и показателем (один ключ шифрует/расшифровывает много блоков).
+
+    Вся подготовка выполняется один раз в конструкторе: проверка типов,
+    выбор реализации и перекодирование показателя для скользящего окна.
+    Отдельная редукция Барретта/Монтгомери не хранится: встроенный pow
+    выполняет редукцию на C быстрее, чем это можно сделать на Python.
+    """
+
+    def __init__(self, modulus, exponent):
+        """
+        Args:
+            modulus (int): Модуль.
+            exponent (int): Показатель степени (ключ).
+        """
+        if exponent < 0:
+            raise ValueError('Показатель степени должен быть неотрицательным')
+        self.modulus = modulus
+        self.exponent = exponent
+        self.use_builtin = type(modulus) is int and type(exponent) is int
+        self.recoding = None if self.use_builtin else sliding_window_recode(exponent)
+
+    def pow(self, base):
+        """
+        Returns:
+            int: base^exponent mod modulus.
+        """
+        if self.use_builtin:
+            return pow(base, self.exponent, self.modulus)
+        return _exp_by_recoding(base, self.recoding, self.modulus)
+
+    def pow_many(self, bases):
+        """
+        Возводит в степень последовательность оснований без вызова
+        Python-функции на каждый элемент.
+
+        Returns:
+            list: Список base^exponent mod modulus для каждого base.
+        """
+        if self.use_builtin:
+            return list(map(pow, bases, itertools.repeat(self.exponent), itertools.repeat(self.modulus)))
+        return [_exp_by_recoding(base, self.recoding, self.modulus) for base in bases]
+
+
+
+# Для модулей не больше этой границы возведение в степень с фиксированным
+# ключом выполняется по таблице всех p значений (табличный режим)
+TABLE_MODE_MAX_MODULUS = 1 << 16
+
+# Ширины блоков (в байтах), для которых поддерживается табличный режим
+TABLE_MODE_WIDTHS = (1, 2)
+
+
+
+def table_mode_supported(modulus, *widths):
+    """True, если для модуля и ширин блоков (в байтах) можно использовать табличный режим."""
+    return modulus <= TABLE_MODE_MAX_MODULUS and all(width in TABLE_MODE_WIDTHS for width in widths)
+
+
+
+def _build_pow_table(modulus, exponent):
+    """x^exponent mod modulus для всех x из [0, modulus), array('H')."""
+    return array.array('H', map(pow, range(modulus), itertools.repeat(exponent), itertools.repeat(modulus)))
+
+
+
+@functools.lru_cache(maxsize=8)
+def pow_table(modulus, exponent, size=None):
+    """
+    Таблица x^exponent mod modulus для всех x из [0, size) (по умолчанию
+    size = modulus; для x >= modulus берется x mod modulus).
+
+    Для малого модуля таблица строится один раз на ключ (p значений), после
+    чего обработка файла сводится к выборке по индексу. Последние таблицы
+    кэшируются.
+
+    Returns:
+        array: array('H') длины size.
+    """
+    values = _build_pow_table(modulus, exponent)
+    size = modulus if size is None else size
+    while len(values) < size:
+        values.extend(values[:size - len(values)])
+    return values
+
+
+
+def table_lookup(table, values):
+    """Выборка table[v] для каждого v из values (результат decode_blocks)."""
+    numpy = block_codec.numpy_or_none()
+    if numpy is not None:
+        return numpy.frombuffer(table, dtype=numpy.uint16)[values]
+    return array.array('H', [table[v] for v in values])
+
+
+
+def table_map_blocks(table, data, width_in, width_out):
+    """
+    Заменяет каждый блок data (big-endian, width_in байт) на table[блок],
+    записанный в width_out байт. Для однобайтовых блоков используется
+    bytes.translate - по таблице перекодировки на каждый байт результата.
+
+    Raises:
+        OverflowError: Если значение не помещается в width_out байт.
+    """
+    if width_in != 1:
+        return encode_blocks(table_lookup(table, decode_blocks(data, width_in)), width_out)
+    row = table[:256]
+    if max(row) >> (8 * width_out):
+        raise OverflowError('int too big to convert')
+    data = bytes(data)
+    out = bytearray(len(data) * width_out)
+    for i in range(width_out):
+        shift = 8 * (width_out - 1 - i)
+        out[i::width_out] = data.translate(bytes((v >> shift) & 0xFF for v in row))
+    return bytes(out)
+
+
+
+def table_mul_mod(table, a, b, modulus):
+    """table[a_i] * b_i mod modulus для пар из последовательностей a и b."""
+    numpy = block_codec.numpy_or_none()
+    if numpy is not None:
+        return numpy.frombuffer(table, dtype=numpy.uint16)[a].astype(numpy.uint32) * b % modulus
+    return array.array('H', [table[x] * y % modulus for x, y in zip(a, b)])
+
+
+
+def _fixed_base_width(bits):
+    """Ширина окна таблицы фиксированного основания по битности показателя."""
+    if bits <= 32:
+        return 4
+    if bits <= 512:
+        return 8
+    return 6
+
+
+
+class FixedBaseTable:
+    """
+    Таблица предвычислений для возведения фиксированного основания
+    (генератора g или a) в произвольные степени.
+
+    Строка i хранит base^(d * 2^(w*i)) для всех цифр d < 2^w, поэтому
+    base^e вычисляется только умножениями (по одному на w-битную цифру e),
+    без возведений в квадрат. Для показателей длиннее max_bits
+    используется встроенный pow.
+    """
+
+    MAGIC = b'FBT1'
+
+    # Наибольшая ширина окна в файле: строка из 2^w - 1 чисел
+    MAX_WIDTH = 16
+
+    def __init__(self, base, modulus, max_bits, width=None, rows=None):
+        """
+        Args:
+            base (int): Фиксированное основание.
+            modulus (int): Модуль.
+            max_bits (int): Максимальная битность показателя.
+            width (int): Ширина окна w (по умолчанию подбирается по max_bits).
+            rows (list): Готовые строки таблицы (при загрузке с диска).
+        """
+        self.base = base % modulus
+        self.modulus = modulus
+        self.max_bits = max_bits
+        self.width = width or _fixed_base_width(max_bits)
+        self.rows = rows if rows is not None else self._build()
+
+    def _build(self):
+        p = self.modulus
+        rows = []
+        s = self.base
+        for _ in range(0, self.max_bits, self.width):
+            row = [1]
+            for _ in range((1 << self.width) - 1):
+                row.append((row[-1] * s) % p)
+            rows.append(row)
+            s = (row[-1] * s) % p
+        return rows
+
+    def pow(self, exponent):
+        """
+        Returns:
+            int: base^exponent mod modulus.
+        """
+        if exponent < 0 or exponent.bit_length() > self.max_bits:
+            return pow(self.base, exponent, self.modulus)
+        p = self.modulus
+        w = self.width
+        mask = (1 << w) - 1
+        y = 1
+        for row in self.rows:
+            if not exponent:
+                break
+            digit = exponent & mask
+            if digit:
+                y = (y * row[digit]) % p
+            exponent >>= w
+        return y % p
+
+    def save(self, path):
+        """
+        Сохраняет таблицу в двоичный файл рядом с параметрами группы.
+        Все числа записываются в big-endian длиной, равной длине модуля.
+        """
+        size = (self.modulus.bit_length() + 7) // 8
+        with open(path, 'wb') as f:
+            f.write(self.MAGIC)
+            f.write(self.width.to_bytes(1, 'big'))
+            f.write(self.max_bits.to_bytes(4, 'big'))
+            f.write(size.to_bytes(4, 'big'))
+            f.write(self.modulus.to_bytes(size, 'big'))
+            f.write(self.base.to_bytes(size, 'big'))
+            for row in self.rows:
+                f.write(b''.join(v.to_bytes(size, 'big') for v in row[1:]))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Загружает таблицу, сохраненную методом save, и проверяет ее
+        по последнему элементу.
+
+        Raises:
+            ValueError: Если файл поврежден или не является таблицей.
+        """
+        with open(path, 'rb') as f:
+            data = memoryview(f.read())
+        if bytes(data[:4]) != cls.MAGIC:
+            raise ValueError(f'Файл {path} не является таблицей фиксированного основания')
+        if len(data) < 13:
+            raise ValueError(f'Таблица {path} повреждена: неполный заголовок')
+        width = data[4]
+        if not 1 <= width <= cls.MAX_WIDTH:
+            raise ValueError(f'Таблица {path} повреждена: неверная ширина окна {width}')
+        max_bits = int.from_bytes(data[5:9], 'big')
+        size = int.from_bytes(data[9:13], 'big')
+        modulus = int.from_bytes(data[13:13 + size], 'big')
+        base = int.from_bytes(data[13 + size:13 + 2 * size], 'big')
+
+        row_len = (1 << width) - 1
+        n_rows = -(-max_bits // width)
+        offset = 13 + 2 * size
+        if len(data) != offset + n_rows * row_len * size:
+            raise ValueError(f'Таблица {path} повреждена: неверная длина файла')
+        rows = []
+        for _ in range(n_rows):
+            row = [1]
+            for _ in range(row_len):
+                row.append(int.from_bytes(data[offset:offset + size], 'big'))
+                offset += size
+            rows.append(row)
+
+        if rows:
+            last_exp = row_len << (width * (n_rows - 1))
+            if rows[-1][-1] != pow(base, last_exp, modulus):
+                raise ValueError(f'Таблица {path} повреждена: контрольная проверка не пройдена')
+        return cls(base, modulus, max_bits, width, rows)
+
+
+
+# (base, modulus) -> [число обращений, максимальная битность показателя, таблица]
+_fixed_base_cache = collections.OrderedDict()
+FIXED_BASE_CACHE_SIZE = 8
+
+# Модель стоимости в модульных умножениях (измерено для модулей 512-2048 бит):
+# pow(base, e, p) - около bits(e) умножений, FixedBaseTable.pow - около
+# 1.3 умножения на строку, построение таблицы - около 1.25 * 2^w на строку.
+# Отсюда безубыточность: ~45 вызовов для 160-256-битных показателей (w = 8;
+# сборка 12-180 мс против выигрыша 5-6x) и ~17 для 1024-2048-битных (w = 6)
+FIXED_BASE_BUILD_COST = 1.25
+FIXED_BASE_TABLE_COST = 1.3
+
+
+
+def fixed_base_min_uses(bits):
+    """
+    Число вызовов fixed_base_pow для показателей длиной bits, после которого
+    построение FixedBaseTable окупается (по модели стоимости выше).
+    """
+    width = _fixed_base_width(bits)
+    rows = -(-bits // width)
+    gain = bits - FIXED_BASE_TABLE_COST * rows
+    if gain <= 0:
+        return math.inf
+    return math.ceil(FIXED_BASE_BUILD_COST * rows * (1 << width) / gain)
+
+
+
+def register_fixed_base_table(table):
+    """
+    Добавляет готовую (например, загруженную с диска) таблицу в кэш,
+    после чего fixed_base_pow сразу использует ее для этого основания.
+    """
+    key = (table.base, table.modulus)
+    _fixed_base_cache[key] = [0, table.max_bits, table]
+    _fixed_base_cache.move_to_end(key)
+    while len(_fixed_base_cache) > FIXED_BASE_CACHE_SIZE:
+        _fixed_base_cache.popitem(last=False)
+
+
+
+def fixed_base_pow(base, exponent, modulus):
+    """
+    Вычисляет base^exponent mod modulus для основания, которое многократно
+    возводится в новые степени (генератор группы, открытый ключ).
+
+    Пока число вызовов для пары (base, modulus) меньше fixed_base_min_uses
+    (порога окупаемости таблицы для наибольшей встреченной битности
+    показателя), они идут через pow; после этого строится FixedBaseTable,
+    и дальнейшие вызовы используют ее.
+    Кэш хранит не более FIXED_BASE_CACHE_SIZE оснований.
+    
+    Args:
+        base (int): Фиксированное основание
+        exponent (int): Показатель степени
+        modulus (int): Модуль
+    
+    Returns:
+        int: Результат вычисления base^exponent mod modulus
+    """
+
+    key = (base % modulus, modulus)
+    entry = _fixed_base_cache.get(key)
+    if entry is None:
+        entry = [0, 0, None]
+        _fixed_base_cache[key] = entry
+        while len(_fixed_base_cache) > FIXED_BASE_CACHE_SIZE:
+            _fixed_base_cache.popitem(last=False)
+    else:
+        _fixed_base_cache.move_to_end(key)
+
+    table = entry[2]
+    if table is not None and exponent.bit_length() <= table.max_bits:
+        return table.pow(exponent)
+
+    entry[0] += 1
+    entry[1] = max(entry[1], exponent.bit_length())
+    if entry[0] < fixed_base_min_uses(entry[1]):
+        return pow(base, exponent, modulus)
+
+    table = FixedBaseTable(base, modulus, entry[1])
+    entry[2] = table
+    return table.pow(exponent)
+
+
+
+# Минимальная битность модуля, начиная с которой совместное возведение
+# в степень на Python обгоняет отдельные вызовы pow (см. benchmark.py)
+MULTI_EXP_MIN_BITS = 256
+
+
+
+def _multi_exp_width(k, bits):
+    """Ширина общего окна для k оснований: таблица имеет 2^(k*w) элементов."""
+    w = 2 if bits <= 384 else 3
+    while w > 1 and k * w > 8:
+        w -= 1
+    return w
+
+
+
+def multi_exp_mod(bases, exponents, p):
+    """
+    Вычисляет произведение b_i^e_i mod p за один проход (метод Штрауса,
+    "трюк Шамира").
+
+    Все показатели просматриваются одновременно окнами по w бит: на каждое
+    окно приходится w общих возведений в квадрат и одно умножение на
+    элемент таблицы произведений степеней оснований. По сравнению с
+    отдельными возведениями в степень число квадратов сокращается в k раз.
+    Для малых модулей выгоднее встроенный pow, и используется он.
+    
+    Args:
+        bases (list): Основания b_i.
+        exponents (list): Неотрицательные показатели e_i.
+        p (int): Модуль.
+    
+    Returns:
+        int: Произведение b_i^e_i mod p.
+    """
+
+    if len(bases) != len(exponents):
+        raise ValueError('Количество оснований и показателей должно совпадать')
+    if p.bit_length() < MULTI_EXP_MIN_BITS or any(e < 0 for e in exponents):
+        y = 1 % p
+        for b, e in zip(bases, exponents):
+            y = (y * pow(b, e, p)) % p
+        return y
+
+    k = len(bases)
+    bits = max((e.bit_length() for e in exponents), default=0)
+    w = _multi_exp_width(k, bits)
+    mask = (1 << w) - 1
+
+    # table[d_0 + (d_1 << w) + ...] = prod b_i^d_i mod p
+    table = [1]
+    for b in bases:
+        s = b % p
+        row = [1, s]
+        for _ in range(mask - 1):
+            row.append((row[-1] * s) % p)
+        table = [(t * r) % p for r in row for t in table]
+
     y = 1
-    s = a % p
-    while x > 0:
-        if x % 2 == 1:
-            y = (y * s) % p
-        x = x // 2
-        s = (s * s) % p
-    return y
+    for pos in range(-(-bits // w) * w - w, -1, -w):
+        for _ in range(w):
+            y = (y * y) % p
+        idx = 0
+        for e in reversed(exponents):
+            idx = (idx << w) | ((e >> pos) & mask)
+        if idx:
+            y = (y * table[idx]) % p
+    return y % p
 
 
 
 def fermat_primality_test(n, k=50):
     """
     Тест простоты Ферма
+
+    Оставлен для совместимости: в библиотеке используется
+    is_probable_prime из модуля primality.
     
     Args:
         n (int): Число для проверки на простоту
@@ -49,10 +607,21 @@ def fermat_primality_test(n, k=50):
 
 
 
+# Шаги Лемера выполняются для чисел длиннее LEHMER_MIN_BITS бит по старшим
+# LEHMER_DIGIT_BITS битам
+LEHMER_MIN_BITS = 512
+LEHMER_DIGIT_BITS = 62
+
+
+
 def extended_euclidean_algorithm(a, b):
     """
     Реализует обобщенный алгоритм Евклида.
 
+    Итеративная версия (без рекурсии и ограничения на ее глубину), для
+    длинных чисел ускоренная методом Лемера. Результат совпадает с прежней
+    рекурсивной реализацией.
+
     Находит наибольший общий делитель (НОД) двух чисел a и b, а также
     коэффициенты x и y, удовлетворяющие тождеству Безу:
     a*x + b*y = НОД(a, b).
@@ -67,12 +636,34 @@ def extended_euclidean_algorithm(a, b):
                x, y - коэффициенты тождества Безу.
     """
 
-    if a == 0:
-        return b, 0, 1
-    gcd, x1, y1 = extended_euclidean_algorithm(b % a, a)
-    x = y1 - (b // a) * x1
-    y = x1
-    return gcd, x, y
+    # Инвариант: r0 = s0*b + t0*a, r1 = s1*b + t1*a
+    r0, r1 = b, a
+    s0, t0, s1, t1 = 1, 0, 0, 1
+    while r1 != 0:
+        if r1 > 0 and r0 > 0 and r0.bit_length() > LEHMER_MIN_BITS:
+            # Шаг Лемера (Кнут, алгоритм L): частные вычисляются по старшим
+            # битам, пока они гарантированно совпадают с настоящими, и затем
+            # применяются к длинным числам одной матрицей 2x2.
+            shift = r0.bit_length() - LEHMER_DIGIT_BITS
+            x, y = r0 >> shift, r1 >> shift
+            A, B, C, D = 1, 0, 0, 1
+            while y + C != 0 and y + D != 0:
+                q = (x + A) // (y + C)
+                if q != (x + B) // (y + D):
+                    break
+                A, C = C, A - q * C
+                B, D = D, B - q * D
+                x, y = y, x - q * y
+            if B != 0:
+                r0, r1 = A * r0 + B * r1, C * r0 + D * r1
+                s0, s1 = A * s0 + B * s1, C * s0 + D * s1
+                t0, t1 = A * t0 + B * t1, C * t0 + D * t1
+                continue
+        q = r0 // r1
+        r0, r1 = r1, r0 - q * r1
+        s0, s1 = s1, s0 - q * s1
+        t0, t1 = t1, t0 - q * t1
+    return r0, t0, s0
 
 
 
@@ -92,86 +683,821 @@ def mod_inverse(n, modulus):
         int: Модульный обратный элемент для n по модулю modulus.
         
     Raises:
-        Exception: Вызывается, если обратный элемент не существует
-                   (т.е. НОД(n, modulus) != 1).
+        NotInvertibleError: Вызывается, если обратный элемент не существует
+                            (т.е. НОД(n, modulus) != 1).
     """
     
-    gcd, x, y = extended_euclidean_algorithm(n, modulus)
-    if gcd != 1:
-        raise Exception('Модульный обратный элемент не существует')
-    return x % modulus
+    try:
+        # Встроенный pow(n, -1, modulus) выполняет тот же алгоритм Евклида на C
+        # и заметно быстрее реализации на Python (см. benchmark.py)
+        return pow(n, -1, modulus)
+    except ValueError:
+        raise NotInvertibleError('Модульный обратный элемент не существует', value=n)
+
+
+
+class NotInvertibleError(Exception):
+    """
+    Обратный элемент не существует.
+
+    Attributes:
+        index (int): Номер необратимого элемента в batch_mod_inverse (иначе None).
+        value (int): Необратимое значение.
+    """
+
+    def __init__(self, message, index=None, value=None):
+        super().__init__(message)
+        self.index = index
+        self.value = value
+
+
+
+def batch_mod_inverse(values, modulus):
+    """
+    Находит обратные элементы для нескольких чисел по одному модулю
+    (трюк Монтгомери).
+
+    Вместо n обращений выполняется одно обращение произведения всех чисел
+    и 3(n-1) умножений: сначала считаются префиксные произведения, затем
+    обратный элемент произведения "раскручивается" в обратном порядке.
+    
+    Args:
+        values (list): Числа, для которых ищутся обратные элементы.
+        modulus (int): Модуль.
+    
+    Returns:
+        list: Обратные элементы в том же порядке.
+        
+    Raises:
+        NotInvertibleError: Если хотя бы одно число не взаимно просто с modulus;
+                            index указывает на первое такое число.
+    """
+
+    values = [v % modulus for v in values]
+    if not values:
+        return []
+
+    prefix = [values[0]]
+    for v in values[1:]:
+        prefix.append((prefix[-1] * v) % modulus)
+
+    try:
+        inv = pow(prefix[-1], -1, modulus)
+    except ValueError:
+        for index, v in enumerate(values):
+            if math.gcd(v, modulus) != 1:
+                raise NotInvertibleError(
+                    f'Модульный обратный элемент не существует для элемента #{index} ({v})',
+                    index, v)
+        raise
+
+    result = [0] * len(values)
+    for i in range(len(values) - 1, 0, -1):
+        result[i] = (inv * prefix[i - 1]) % modulus
+        inv = (inv * values[i]) % modulus
+    result[0] = inv
+    return result
 
 
 
 def generate_safe_prime(min_val, max_val):
     """
+    Генерация безопасного простого P = 2Q + 1 совместным просеиванием.
+
+    Кандидаты Q просеиваются окнами так, что уцелевает только Q, для которого
+    ни Q, ни 2Q + 1 не делятся на малые простые (primality.sieve_window
+    с safe=True). Полная проверка простоты выполняется только для них:
+    сначала Q, затем P.
+
     Args:
         min_val (int): Минимальное значение для P.
         max_val (int): Максимальное значение для P.
         
     Returns:
         tuple: Кортеж (P, Q), где P - безопасное простое, Q - простое число Софи Жермен.
+
+    Raises:
+        ValueError: Если в диапазоне нет безопасных простых.
     """
-    while True:
-        q_candidate = random.randint(min_val // 2, max_val // 2)
-        
-        if fermat_primality_test(q_candidate):
-            p_candidate = 2 * q_candidate + 1
-            
-            if fermat_primality_test(p_candidate):
-                return p_candidate, q_candidate
+
+    q = _sieve_search(max(min_val, 7) // 2, (max_val - 1) // 2, True,
+                      lambda q: is_probable_prime(q) and is_probable_prime(2 * q + 1))
+    if q is not None:
+        return 2 * q + 1, q
+    for p, q in ((5, 2), (7, 3)):
+        if min_val <= p <= max_val:
+            return p, q
+    raise ValueError(f'В диапазоне [{min_val}, {max_val}] нет безопасных простых чисел')
+
+
+
+# p -> кортеж различных простых делителей p - 1
+_order_factor_cache = collections.OrderedDict()
+ORDER_FACTOR_CACHE_SIZE = 64
 
 
 
-def find_primitive_root(p, q):
+def order_factors(p, factors=None):
     """
+    Различные простые делители порядка p - 1 мультипликативной группы по модулю p.
+
+    Разложение кэшируется по p (не более ORDER_FACTOR_CACHE_SIZE значений).
+    Если разложение известно заранее (безопасное или структурированное
+    простое), его можно передать в factors: оно проверяется один раз и
+    запоминается без факторизации; повторная передача того же набора
+    возвращает кэш без проверки. Иначе p - 1 раскладывается primality.factorize.
+
     Args:
-        p (int): Безопасное простое число.
-        q (int): Простое число Софи Жермен (q = (p-1)/2).
-        
+        p (int): Простое число.
+        factors (iterable): Известные простые делители p - 1 (все различные).
+
+    Returns:
+        tuple: Простые делители p - 1 по возрастанию.
+
+    Raises:
+        ValueError: Если factors не являются полным набором простых делителей p - 1.
+    """
+
+    cached = _order_factor_cache.get(p)
+    if cached is not None and (factors is None or set(factors) == set(cached)):
+        _order_factor_cache.move_to_end(p)
+        return cached
+
+    if factors is None:
+        result = tuple(primality.factorize(p - 1))
+    else:
+        result = tuple(sorted(set(factors)))
+        rest = p - 1
+        for r in result:
+            if rest % r or not is_probable_prime(r):
+                raise ValueError(f'{r} не является простым делителем p - 1')
+            while rest % r == 0:
+                rest //= r
+        if rest != 1:
+            raise ValueError(f'Разложение p - 1 неполное: остался множитель {rest}')
+
+    _order_factor_cache[p] = result
+    _order_factor_cache.move_to_end(p)
+    while len(_order_factor_cache) > ORDER_FACTOR_CACHE_SIZE:
+        _order_factor_cache.popitem(last=False)
+    return result
+
+
+
+def _cofactor_powers_are_not_one(h, factors, p):
+    """
+    Для h = g^((p-1) / R), где R - произведение factors, проверяет, что
+    h^(R / r) != 1 для каждого r из factors, то есть g^((p-1) / r) != 1.
+
+    Все k степеней вычисляются деревом: половина делителей "убирается" одним
+    возведением в степень произведения другой половины. Это log2(k) уровней
+    вместо k полных возведений; если на каком-то уровне получилась 1,
+    проверка сразу завершается.
+    """
+
+    if h == 1:
+        return False
+    if len(factors) == 1:
+        return True
+    mid = len(factors) // 2
+    left, right = factors[:mid], factors[mid:]
+    return (_cofactor_powers_are_not_one(pow(h, math.prod(right), p), left, p)
+            and _cofactor_powers_are_not_one(pow(h, math.prod(left), p), right, p))
+
+
+
+def is_primitive_root(g, p, factors=None):
+    """
+    Проверяет, что g - первообразный корень по простому модулю p:
+    g^((p-1)/r) != 1 для каждого простого делителя r числа p - 1.
+
+    Args:
+        g (int): Кандидат.
+        p (int): Простое число.
+        factors (iterable): Простые делители p - 1 (по умолчанию order_factors(p)).
+    """
+
+    if p == 2:
+        return g % p == 1
+    return _is_primitive_root(g, p, order_factors(p, factors))
+
+
+
+def _is_primitive_root(g, p, factors):
+    """is_primitive_root для p > 2 и готового кортежа factors (без проверки разложения)."""
+    g %= p
+    if g == 0:
+        return False
+    return _cofactor_powers_are_not_one(pow(g, (p - 1) // math.prod(factors), p), factors, p)
+
+
+
+def find_primitive_root(p, q=None, factors=None, randomized=False, rng=random):
+    """
+    Поиск первообразного корня по простому модулю p.
+
+    Для безопасного простого p = 2q + 1 достаточно передать q. Для других p
+    используются делители factors или разложение p - 1 из кэша order_factors.
+    По умолчанию возвращается наименьший первообразный корень (перебор
+    g = 2, 3, ...); в режиме randomized кандидаты выбираются случайно -
+    доля первообразных корней равна phi(p-1)/(p-1), поэтому ожидаемое
+    число попыток мало и не зависит от того, как далеко наименьший корень.
+
+    Args:
+        p (int): Простое число.
+        q (int): Простое число Софи Жермен (q = (p-1)/2), если p безопасное.
+        factors (iterable): Простые делители p - 1.
+        randomized (bool): Случайный поиск.
+        rng: Источник случайности для randomized.
+
     Returns:
         int: Первообразный корень g.
     """
+
+    if p == 2:
+        return 1
+    if factors is None and q is not None and p == 2 * q + 1:
+        # q уже доказано простым при генерации безопасного простого,
+        # поэтому разложение (2, q) не проверяется
+        factors = tuple(sorted({2, q}))
+    else:
+        factors = order_factors(p, factors)
+
+    if randomized and p > 3:
+        while True:
+            g = rng.randrange(2, p - 1)
+            if _is_primitive_root(g, p, factors):
+                return g
     for g in range(2, p):
-        if fast_exp_mod(g, q, p) != 1:
+        if _is_primitive_root(g, p, factors):
             return g
     return None
 
 
-    
+
+# Выше этой границы p - 1 случайного простого уже не раскладывается быстро,
+# и generate_structured_prime строит p с известным разложением p - 1
+STRUCTURED_PRIME_MIN = 2**64
+
+
+
+def generate_structured_prime(min_val, max_val, cofactor_bits=64, rng=random):
+    """
+    Генерация простого P из [min_val, max_val] с известным разложением P - 1.
+
+    P ищется в виде b*Q + 1, где Q - большое простое, а четный множитель b
+    не длиннее cofactor_bits бит и раскладывается быстро. В отличие от
+    безопасного простого, где простыми должны быть сразу Q и 2Q + 1,
+    здесь при фиксированном Q проверяется только P, поэтому поиск в
+    десятки раз дешевле. Дискретный логарифм по модулю такого P не проще,
+    чем в подгруппе порядка Q.
+
+    Для P < STRUCTURED_PRIME_MIN берется обычное случайное простое, а P - 1
+    раскладывается целиком.
+
+    Args:
+        min_val (int): Минимальное значение для P.
+        max_val (int): Максимальное значение для P.
+        cofactor_bits (int): Максимальная битность множителя b.
+        rng: Источник случайности.
+
+    Returns:
+        tuple: Кортеж (P, Q, factors): Q - наибольший простой делитель P - 1,
+               factors - все простые делители P - 1 (они сразу попадают
+               в кэш order_factors).
+    """
+
+    if max_val < STRUCTURED_PRIME_MIN or max_val - min_val < max_val >> 8:
+        p = generate_prime_range(min_val, max_val)
+        factors = order_factors(p)
+        return p, factors[-1], factors
+
+    bits = max_val.bit_length()
+    cofactor_bits = min(cofactor_bits, bits // 4)
+    while True:
+        q = generate_prime_bits(bits - cofactor_bits)
+        b_min = max(2, -(-(min_val - 1) // q))
+        b_max = (max_val - 1) // q
+        for _ in range(4 * bits):
+            b = rng.randrange(b_min, b_max + 1) & ~1
+            if b < b_min:
+                continue
+            p = b * q + 1
+            if is_probable_prime(p):
+                factors = order_factors(p, (*primality.factorize(b, rng), q))
+                return p, q, factors
+
+
+
 def calculate_file_hash(filepath):
     """
-    Вычисляет хэш SHA-256 файла
+    Вычисляет хэш SHA-256 файла (см. hashing.file_digests: большой буфер,
+    кэш хэшей по inode/размеру/времени изменения).
     """
-    sha256_hash = hashlib.sha256()
     try:
-        with open(filepath, "rb") as f:
-            # Читаем файл по частям для экономии памяти
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.digest()
+        return hashing.file_digests(filepath, ('sha256',))['sha256']
     except FileNotFoundError:
         return None
+    except OSError as e:
+        print(f"Ошибка чтения файла {filepath}: {e}")
+        return None
 
 
 def file_hash_sha1(filepath):
     """
-    Вычисляет хэш SHA-1 файла
+    Вычисляет хэш SHA-1 файла (см. hashing.file_digests).
     """
-    sha256_hash = hashlib.sha1()
     try:
-        with open(filepath, "rb") as f:
-            # Читаем файл по частям для экономии памяти
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.digest()
+        return hashing.file_digests(filepath, ('sha1',))['sha1']
     except FileNotFoundError:
         return None
+    except OSError as e:
+        print(f"Ошибка чтения файла {filepath}: {e}")
+        return None
+
+
+def calculate_stream_hash(source):
+    """
+    Вычисляет хэш SHA-256 потока: файлового объекта, bytes/memoryview или
+    итератора блоков (см. hashing.stream_digests).
+    """
+    return hashing.stream_digests(source, ('sha256',))['sha256']
+
+
+def stream_hash_sha1(source):
+    """
+    Вычисляет хэш SHA-1 потока (см. hashing.stream_digests).
+    """
+    return hashing.stream_digests(source, ('sha1',))['sha1']
+
+
+
+def _sieve_layout(min_val, max_val):
+    """
+    Разбиение нечетных чисел из [min_val, max_val] на окна решета.
+
+    Returns:
+        tuple or None: (первое нечетное, число кандидатов, размер окна,
+                       малые простые) или None, если кандидатов нет.
+    """
+    lo = max(min_val, 3) | 1
+    hi = max_val if max_val % 2 else max_val - 1
+    total = (hi - lo) // 2 + 1 if hi >= lo else 0
+    if total <= 0:
+        return None
+    limit, window = primality.sieve_params(hi.bit_length())
+    return lo, total, window, primality.small_primes(limit)
+
+
+
+def _sieve_window_count(min_val, max_val):
+    """Число окон решета, покрывающих [min_val, max_val]."""
+    layout = _sieve_layout(min_val, max_val)
+    if layout is None:
+        return 0
+    _, total, window, _ = layout
+    return -(-total // window)
+
+
+
+def _sieve_search(min_val, max_val, safe, accept, rng=random, window_index=None):
+    """
+    Перебирает нечетные числа из [min_val, max_val] окнами, начиная со
+    случайного места и продолжая с начала диапазона.
+
+    Каждое окно просеивается primality.sieve_window, и для уцелевших
+    кандидатов вызывается accept.
+
+    Args:
+        rng: Источник случайности для выбора начала (по умолчанию модуль random).
+        window_index (int): Если задан, просматривается только окно с этим
+                            номером (см. _sieve_window_count); используется
+                            параллельным поиском.
+
+    Returns:
+        int or None: Первый кандидат, для которого accept вернул True.
+    """
+
+    layout = _sieve_layout(min_val, max_val)
+    if layout is None:
+        return None
+    lo, total, window, primes = layout
+
+    if window_index is None:
+        first = rng.randrange(total)
+        spans = ((first, total), (0, first))
+    else:
+        spans = ((window_index * window, min(total, (window_index + 1) * window)),)
+    for begin, end in spans:
+        while begin < end:
+            if _search_stopped():
+                return None
+            count = min(window, end - begin)
+            start = lo + 2 * begin
+            flags = primality.sieve_window(start, count, primes, safe)
+            for i in itertools.compress(range(count), flags):
+                if accept(start + 2 * i):
+                    return start + 2 * i
+            begin += count
+    return None
+
+
+
+def generate_prime_range(min_val, max_val):
+    """
+    Генерация случайного простого числа из диапазона [min_val, max_val]
+    поиском по решету.
+
+    Выбирается случайное нечетное начало, окно кандидатов за ним просеивается
+    малыми простыми (primality.sieve_window), и полный тест простоты
+    выполняется только для уцелевших чисел. Если до конца диапазона простое
+    не найдено, поиск продолжается с его начала.
+    
+    Args:
+        min_val (int): Минимальное значение.
+        max_val (int): Максимальное значение.
+    
+    Returns:
+        int: Простое число из диапазона.
+
+    Raises:
+        ValueError: Если в диапазоне нет простых чисел.
+    """
+
+    p = _sieve_search(min_val, max_val, False, is_probable_prime)
+    if p is not None:
+        return p
+    if min_val <= 2 <= max_val:
+        return 2
+    raise ValueError(f'В диапазоне [{min_val}, {max_val}] нет простых чисел')
+
 
 
 def generate_prime_bits(bits):
     """Генерация простого числа заданной битности"""
-    while True:
-        num = random.randint(2**(bits-1), 2**bits - 1)
-        if fermat_primality_test(num):
-            return num
\ No newline at end of file
+    return generate_prime_range(2**(bits-1), 2**bits - 1)
+
+
+
+# Событие остановки, разделяемое процессами пула параллельного поиска
+_stop_event = None
+
+
+
+def _init_search_worker(stop_event):
+    global _stop_event
+    _stop_event = stop_event
+
+
+
+def _search_stopped():
+    """True, если параллельный поиск уже нашел результат в другом процессе."""
+    return _stop_event is not None and _stop_event.is_set()
+
+
+
+def _prime_search_job(seed, index, min_val, max_val, safe):
+    """
+    Одна порция параллельного поиска (безопасного) простого: одно окно решета.
+    Порции 0, 1, 2, ... просматривают окна подряд со случайного (по seed)
+    окна, так что первые _sieve_window_count порций покрывают весь диапазон.
+    """
+    windows = _sieve_window_count(min_val, max_val)
+    if index >= windows:
+        return None
+    if safe:
+        accept = lambda q: is_probable_prime(q) and is_probable_prime(2 * q + 1)
+    else:
+        accept = is_probable_prime
+    offset = random.Random(seed).randrange(windows)
+    return _sieve_search(min_val, max_val, safe, accept, window_index=(offset + index) % windows)
+
+
+
+def _dsa_prime_search_job(seed, index, q, p_bits, tries):
+    """Одна порция параллельного поиска простого p = b*q + 1 длиной p_bits бит."""
+    rng = random.Random(f'{seed}/{index}')
+    min_b = (2**(p_bits-1) - 1) // q
+    max_b = (2**p_bits - 2) // q
+    for _ in range(tries):
+        if _search_stopped():
+            return None
+        # q нечетно, поэтому p = b*q + 1 может быть простым только при четном b
+        b = rng.randint(min_b, max_b) & ~1
+        p = b * q + 1
+        if p.bit_length() == p_bits and is_probable_prime(p):
+            return p, b
+    return None
+
+
+
+def parallel_search(job, args, workers=None, seed=None, max_jobs=None):
+    """
+    Распределяет поиск кандидатов по пулу процессов.
+
+    Поиск разбит на пронумерованные порции: порция i вызывает
+    job(seed, i, *args) и возвращает найденное значение или None.
+    Как только результат найден, новые порции не запускаются, а
+    выполняющиеся останавливаются через общее событие.
+
+    Если seed задан, возвращается результат порции с наименьшим номером
+    (дожидаясь всех порций с меньшими номерами), поэтому ответ не зависит
+    от числа процессов и порядка их завершения. Без seed возвращается
+    первый найденный результат.
+    
+    Args:
+        job (callable): Функция порции уровня модуля (должна сериализоваться pickle).
+        args (tuple): Дополнительные аргументы job.
+        workers (int): Число процессов (по умолчанию os.cpu_count()).
+        seed: Зерно для воспроизводимого результата.
+        max_jobs (int): Число порций, покрывающее все пространство поиска
+                        (по умолчанию не ограничено).
+    
+    Returns:
+        Результат первой успешной порции или None, если все max_jobs
+        порций ничего не нашли.
+    """
+
+    deterministic = seed is not None
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(128)
+    workers = workers or os.cpu_count() or 1
+
+    indices = itertools.count() if max_jobs is None else range(max_jobs)
+    if workers == 1:
+        for index in indices:
+            result = job(seed, index, *args)
+            if result is not None:
+                return result
+        return None
+
+    # Импортируются здесь, а не в начале модуля: они почти вдвое
+    # увеличивают время импорта crypt_lib, а нужны только при workers > 1
+    import concurrent.futures
+    import multiprocessing
+
+    ctx = multiprocessing.get_context()
+    stop_event = ctx.Event()
+    best = None
+    with concurrent.futures.ProcessPoolExecutor(workers, mp_context=ctx,
+                                                initializer=_init_search_worker,
+                                                initargs=(stop_event,)) as pool:
+        pending = {}
+        indices = iter(indices)
+        try:
+            while True:
+                while best is None and len(pending) < 2 * workers:
+                    index = next(indices, None)
+                    if index is None:
+                        break
+                    pending[pool.submit(job, seed, index, *args)] = index
+                if not pending:
+                    break
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    result = future.result()
+                    if result is not None and (best is None or index < best[0]):
+                        best = (index, result)
+                if best is not None:
+                    for future, index in list(pending.items()):
+                        if index > best[0] and future.cancel():
+                            del pending[future]
+                    if not deterministic or all(index > best[0] for index in pending.values()):
+                        break
+        finally:
+            stop_event.set()
+            for future in pending:
+                future.cancel()
+    return None if best is None else best[1]
+
+
+
+def parallel_generate_prime(min_val, max_val, workers=None, seed=None):
+    """
+    Параллельная генерация простого числа из диапазона [min_val, max_val].
+    См. parallel_search.
+
+    Returns:
+        int: Простое число.
+
+    Raises:
+        ValueError: Если в диапазоне нет простых чисел.
+    """
+    p = parallel_search(_prime_search_job, (min_val, max_val, False), workers, seed,
+                        max_jobs=_sieve_window_count(min_val, max_val))
+    if p is not None:
+        return p
+    if min_val <= 2 <= max_val:
+        return 2
+    raise ValueError(f'В диапазоне [{min_val}, {max_val}] нет простых чисел')
+
+
+
+def parallel_generate_safe_prime(min_val, max_val, workers=None, seed=None):
+    """
+    Параллельная генерация безопасного простого P = 2Q + 1 из [min_val, max_val].
+    См. parallel_search.
+
+    Returns:
+        tuple: Кортеж (P, Q).
+
+    Raises:
+        ValueError: Если в диапазоне нет безопасных простых.
+    """
+    q_range = (max(min_val, 7) // 2, (max_val - 1) // 2)
+    q = parallel_search(_prime_search_job, (*q_range, True), workers, seed,
+                        max_jobs=_sieve_window_count(*q_range))
+    if q is not None:
+        return 2 * q + 1, q
+    for p, q in ((5, 2), (7, 3)):
+        if min_val <= p <= max_val:
+            return p, q
+    raise ValueError(f'В диапазоне [{min_val}, {max_val}] нет безопасных простых чисел')
+
+
+
+def generate_dsa_group(q_bits, p_bits, workers=None, seed=None, tries=32):
+    """
+    Параллельная генерация параметров группы для подписей ГОСТ Р 34.10-94
+    и FIPS 186: простое q длиной q_bits и простое p = b*q + 1 длиной p_bits.
+
+    Args:
+        q_bits (int): Битность q.
+        p_bits (int): Битность p.
+        workers (int): Число процессов (по умолчанию os.cpu_count()).
+        seed: Зерно для воспроизводимого результата.
+        tries (int): Количество значений b в одной порции поиска.
+
+    Returns:
+        tuple: Кортеж (q, p, b).
+    """
+    q = parallel_generate_prime(2**(q_bits-1), 2**q_bits - 1, workers,
+                                None if seed is None else f'{seed}/q')
+    p, b = parallel_search(_dsa_prime_search_job, (q, p_bits, tries), workers,
+                           None if seed is None else f'{seed}/p')
+    return q, p, b
+
+
+
+def _reseed_worker():
+    # Процессы, созданные через fork, наследуют состояние random родителя
+    random.seed()
+
+
+
+class PrimePool:
+    """
+    Фоновый пул заранее сгенерированных простых и безопасных простых.
+
+    Для каждой битности хранится ограниченная очередь (не больше capacity)
+    готовых чисел. После start() фоновые потоки пополняют самую пустую
+    очередь; при use_processes сама генерация выполняется в пуле процессов,
+    а поток лишь ждет результата (не удерживая GIL). Потребитель берет
+    готовое число из очереди, поэтому задержка "новый ключ" не зависит
+    от генерации.
+
+    Потоки не запускаются при создании пула: start() (или with) вызывается
+    из точки входа приложения. До запуска и для битности, запрошенной
+    впервые, число генерируется сразу.
+    """
+
+    def __init__(self, prime_bits=(), safe_prime_bits=(), capacity=4, workers=1, use_processes=False):
+        """
+        Args:
+            prime_bits (iterable): Битности простых чисел для предварительной генерации.
+            safe_prime_bits (iterable): Битности безопасных простых.
+            capacity (int): Максимальный размер каждой очереди.
+            workers (int): Количество фоновых потоков (и процессов).
+            use_processes (bool): Генерировать в пуле процессов.
+        """
+        self.capacity = capacity
+        self.workers = workers
+        self.use_processes = use_processes
+        self._queues = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._executor = None
+        self._threads = []
+
+        for bits in prime_bits:
+            self._register(('prime', bits))
+        for bits in safe_prime_bits:
+            self._register(('safe', bits))
+
+    def start(self):
+        """
+        Запускает фоновые потоки (повторный вызов ничего не делает).
+
+        Returns:
+            PrimePool: Этот же пул.
+        """
+        with self._lock:
+            if self._threads:
+                return self
+            if self.use_processes:
+                import concurrent.futures
+                self._executor = concurrent.futures.ProcessPoolExecutor(self.workers, initializer=_reseed_worker)
+            self._threads = [threading.Thread(target=self._refill, daemon=True) for _ in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def _generate(key):
+        kind, bits = key
+        if kind == 'safe':
+            return generate_safe_prime(2**(bits-1), 2**bits - 1)
+        return generate_prime_bits(bits)
+
+    def _register(self, key):
+        with self._lock:
+            q = self._queues.get(key)
+            if q is None:
+                q = self._queues[key] = queue.Queue(self.capacity)
+        self._wakeup.set()
+        return q
+
+    def _most_needed(self):
+        """Очередь с наибольшим числом свободных мест (None, если все полны)."""
+        with self._lock:
+            items = list(self._queues.items())
+        key, q = max(items, key=lambda item: self.capacity - item[1].qsize(), default=(None, None))
+        if q is None or q.full():
+            return None
+        return key
+
+    def _refill(self):
+        while not self._stop.is_set():
+            key = self._most_needed()
+            if key is None:
+                self._wakeup.wait(0.5)
+                self._wakeup.clear()
+                continue
+            if self._executor is not None:
+                import concurrent.futures
+                try:
+                    value = self._executor.submit(self._generate, key).result()
+                except (RuntimeError, concurrent.futures.CancelledError):
+                    return
+            else:
+                value = self._generate(key)
+            try:
+                self._queues[key].put_nowait(value)
+            except queue.Full:
+                pass
+
+    def _take(self, key, timeout):
+        with self._lock:
+            q = self._queues.get(key)
+            started = bool(self._threads)
+        if q is None:
+            # Новая битность: ставим на предварительную генерацию, а это число генерируем сразу
+            self._register(key)
+            return self._generate(key)
+        if not started:
+            try:
+                return q.get_nowait()
+            except queue.Empty:
+                return self._generate(key)
+        try:
+            value = q.get(timeout=timeout)
+        except queue.Empty:
+            value = self._generate(key)
+        self._wakeup.set()
+        return value
+
+    def get_prime(self, bits, timeout=None):
+        """
+        Returns:
+            int: Простое число длиной bits бит.
+        """
+        return self._take(('prime', bits), timeout)
+
+    def get_safe_prime(self, bits, timeout=None):
+        """
+        Returns:
+            tuple: Кортеж (P, Q), P - безопасное простое длиной bits бит.
+        """
+        return self._take(('safe', bits), timeout)
+
+    def sizes(self):
+        """Текущие размеры очередей: {(вид, битность): количество}."""
+        with self._lock:
+            return {key: q.qsize() for key, q in self._queues.items()}
+
+    def close(self):
+        """Останавливает фоновые потоки и пул процессов."""
+        self._stop.set()
+        self._wakeup.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        for thread in self._threads:
+            thread.join()
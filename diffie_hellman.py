@@ -3,19 +3,55 @@ import math
 import os
 import random
 
-def generate_diffie_hellman_strong_params(min_p=1000000, max_p=5000000):
+import param_store
+
+def generate_diffie_hellman_group(min_p=1000000, max_p=5000000, structured=False):
+    """
+    Генерирует группу Диффи-Хеллмана по безопасному простому p = 2q + 1.
+    При structured используется структурированное простое p = b*q + 1
+    (cl.generate_structured_prime): его поиск намного дешевле, а разложение
+    p - 1 известно, поэтому первообразный корень ищется случайным перебором.
+
+    Returns:
+        dict: Параметры группы {'p', 'q', 'g'}.
+    """
+    if structured:
+        p, q, factors = cl.generate_structured_prime(min_p, max_p)
+        g = cl.find_primitive_root(p, factors=factors, randomized=True)
+    else:
+        p, q = cl.generate_safe_prime(min_p, max_p)
+        g = cl.find_primitive_root(p, q)
+    return {'p': p, 'q': q, 'g': g}
+
+
+
+def generate_diffie_hellman_strong_params(min_p=1000000, max_p=5000000, use_store=True, structured=False):
     """
     
     Args:
         min_p (int): Минимальное значение для модуля P.
         max_p (int): Максимальное значение для модуля P.
+        use_store (bool): Брать группу (p, g) из хранилища параметров
+                          (param_store), генерируя ее только при первом вызове,
+                          вместе с сохраненной таблицей степеней g.
+        structured (bool): Использовать структурированное простое вместо
+                           безопасного (см. generate_diffie_hellman_group).
     
     Returns:
         tuple: Кортеж (p, g, secret_a, secret_b).
     """
-    p, q = cl.generate_safe_prime(min_p, max_p)
-    
-    g = cl.find_primitive_root(p, q)
+    if use_store:
+        group = param_store.get_or_generate(
+            'dh_structured' if structured else 'dh', f'{min_p}-{max_p}',
+            lambda: generate_diffie_hellman_group(min_p, max_p, structured),
+            param_store.structured_group_validator(min_p, max_p) if structured
+            else param_store.safe_prime_group_validator(min_p, max_p))
+        param_store.load_fixed_base_table(
+            'dh_structured' if structured else 'dh', f'{min_p}-{max_p}',
+            group['g'], group['p'], (group['p'] - 2).bit_length())
+    else:
+        group = generate_diffie_hellman_group(min_p, max_p, structured)
+    p, g = group['p'], group['g']
     
     secret_a = random.randint(2, p - 2)
     secret_b = random.randint(2, p - 2)
@@ -48,9 +84,9 @@ def diffie_hellman_exchange(p, g, secret_a, secret_b):
                - shared_secret_a (int): Общий секрет, вычисленный Алисой.
                - shared_secret_b (int): Общий секрет, вычисленный Бобом.
     """
-    public_a = cl.fast_exp_mod(g, secret_a, p)
+    public_a = cl.fixed_base_pow(g, secret_a, p)
     
-    public_b = cl.fast_exp_mod(g, secret_b, p)
+    public_b = cl.fixed_base_pow(g, secret_b, p)
     
     shared_secret_a = cl.fast_exp_mod(public_b, secret_a, p)
     
@@ -63,7 +99,7 @@ def get_dh_input_from_keyboard():
     """Получение параметров p, g, X_A, X_B с клавиатуры."""
     try:
         p = int(input("Введите простое число p (модуль): "))
-        if not cl.fermat_primality_test(p):
+        if not cl.is_probable_prime(p, bpsw=True):
             print(f"Предупреждение: {p} не является вероятно простым числом.")
         
         g = int(input(f"Введите g (генератор, 1 < g < {p-1}): "))
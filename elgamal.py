@@ -1,12 +1,40 @@
 import crypt_lib as cl
+import hashlib
+import hmac
 import math
 import os
 import random
 
-def elgamal_generate_params(min_p = 255, max_p=65535):
+import block_codec
+import param_store
+
+def elgamal_generate_group(min_p = 255, max_p=65535, structured=False):
+    """
+    Генерирует группу Эль-Гамаля по безопасному простому p = 2q + 1.
+    При structured используется структурированное простое p = b*q + 1
+    (cl.generate_structured_prime): его поиск намного дешевле, а разложение
+    p - 1 известно, поэтому первообразный корень ищется случайным перебором.
+
+    Returns:
+        dict: Параметры группы {'p', 'q', 'g'}.
+    """
+    if structured:
+        p, q, factors = cl.generate_structured_prime(min_p, max_p)
+        g = cl.find_primitive_root(p, factors=factors, randomized=True)
+    else:
+        p, q = cl.generate_safe_prime(min_p, max_p)
+        g = cl.find_primitive_root(p, q)
+    return {'p': p, 'q': q, 'g': g}
+
+def elgamal_generate_params(min_p = 255, max_p=65535, use_store=True, structured=False):
     """
     Генерирует полный набор параметров для протокола Эль-Гамаля:
     p выбирается > 256, чтобы любой байт (0-255) был меньше p.
+    При use_store группа (p, g) берется из хранилища параметров (param_store),
+    заново генерируются только ключи; вместе с группой загружается
+    сохраненная таблица степеней g (cl.FixedBaseTable).
+    При structured группа строится по структурированному простому
+    (см. elgamal_generate_group).
     Returns:
         tuple: Кортеж, содержащий:
             - p (int): Большое простое число.
@@ -15,11 +43,21 @@ def elgamal_generate_params(min_p = 255, max_p=65535):
             - y (int): Публичный (открытый) ключ Боба (d_b).
     """
 
-    p, q = cl.generate_safe_prime(min_p, max_p)
-    g = cl.find_primitive_root(p, q)
+    if use_store:
+        group = param_store.get_or_generate(
+            'elgamal_structured' if structured else 'elgamal', f'{min_p}-{max_p}',
+            lambda: elgamal_generate_group(min_p, max_p, structured),
+            param_store.structured_group_validator(min_p, max_p) if structured
+            else param_store.safe_prime_group_validator(min_p, max_p))
+        param_store.load_fixed_base_table(
+            'elgamal_structured' if structured else 'elgamal', f'{min_p}-{max_p}',
+            group['g'], group['p'], (group['p'] - 2).bit_length())
+    else:
+        group = elgamal_generate_group(min_p, max_p, structured)
+    p, g = group['p'], group['g']
 
     x = random.randint(2, p-1)
-    y = cl.fast_exp_mod(g, x, p)
+    y = cl.fixed_base_pow(g, x, p)
 
     return p, g, x, y
 
@@ -36,21 +74,17 @@ def elgamal_encrypt_file(input_path, output_path, p, g, public_key_y, block_size
         block_size_out (int): Размер блока для записи чисел a и b (в байтах).
     """
     try:
-        with open(input_path, 'rb') as f_in, open(output_path, 'wb') as f_out:
-            while True:
-                block = f_in.read(1)
-                if not block:
-                    break
-                
-                m = int.from_bytes(block, byteorder='big')
-                
+        g_table = cl.FixedBaseTable(g, p, (p - 2).bit_length())
+        y_table = cl.FixedBaseTable(public_key_y, p, (p - 2).bit_length())
+        def encrypt_chunk(values):
+            pairs = []
+            for m in values:
                 k = random.randint(2, p - 2)
-                
-                a = cl.fast_exp_mod(g, k, p)
-                b = (cl.fast_exp_mod(public_key_y, k, p) * m) % p
+                pairs.append(g_table.pow(k))
+                pairs.append((y_table.pow(k) * m) % p)
+            return pairs
 
-                f_out.write(a.to_bytes(block_size_out, byteorder='big'))
-                f_out.write(b.to_bytes(block_size_out, byteorder='big'))
+        block_codec.process_file(input_path, output_path, 1, block_size_out, encrypt_chunk)
         return True
     
     except FileNotFoundError:
@@ -70,25 +104,204 @@ def elgamal_decrypt_file(input_path, output_path, p, private_key_x, block_size_i
         p (int): Публичный параметр (простое число).
         private_key_x (int): Приватный ключ получателя (X).
         block_size_in (int): Размер блока для чтения чисел a и b (в байтах).
+
+    Для p <= cl.TABLE_MODE_MAX_MODULUS и блоков по 1-2 байта степени
+    a^(p-1-x) берутся из таблицы (cl.pow_table), файл обрабатывается порциями.
+    """
+    try:
+        if cl.table_mode_supported(p, block_size_in):
+            # Малый модуль: a^(p-1-x) mod p берется из таблицы
+            table = cl.pow_table(p, p - 1 - private_key_x, 256**block_size_in)
+            pair_size = 2 * block_size_in
+            with open(input_path, 'rb') as f_in, open(output_path, 'wb') as f_out:
+                for chunk in block_codec.read_chunks(f_in, pair_size):
+                    # Неполная последняя пара отбрасывается, как и при поблочной обработке
+                    values = cl.decode_blocks(chunk[:len(chunk) - len(chunk) % pair_size], block_size_in)
+                    f_out.write(cl.encode_blocks(cl.table_mul_mod(table, values[0::2], values[1::2], p), 1))
+            return True
+
+        ctx = cl.ModContext(p, p - 1 - private_key_x)
+        # Пара (a, b) разбирается как одно число ширины 2 * block_size_in
+        shift = 8 * block_size_in
+        mask = (1 << shift) - 1
+        block_codec.process_file(
+            input_path, output_path, 2 * block_size_in, 1,
+            lambda pairs: [ctx.pow(ab >> shift) * (ab & mask) % p for ab in pairs],
+            drop_tail=True)
+        return True
+    except FileNotFoundError:
+        print(f"Ошибка: Файл не найден по пути {input_path}")
+        return False
+
+
+
+# Гибридный режим: сигнатура формата, размер порции потокового шифрования
+# (входит в формат - номер порции участвует в генерации гаммы) и длина MAC
+HYBRID_MAGIC = b'EGH1'
+HYBRID_CHUNK_SIZE = 1 << 20
+HYBRID_TAG_SIZE = 32
+
+# Наименьшая длина p для гибридного режима. Ключи сеанса выводятся только из
+# общего секрета y^k mod p, а MAC подтверждает верную догадку, поэтому при
+# коротком p (например, p < 65536 из elgamal_generate_params) секрет и
+# вместе с ним ключ сеанса подбираются перебором
+HYBRID_MIN_P_BITS = 2048
+
+
+
+def elgamal_generate_hybrid_params(use_store=True):
+    """
+    elgamal_generate_params для гибридного режима: группа по
+    структурированному простому p длиной HYBRID_MIN_P_BITS бит (при use_store
+    генерируется один раз и берется из хранилища параметров).
+    """
+    return elgamal_generate_params(2**(HYBRID_MIN_P_BITS - 1), 2**HYBRID_MIN_P_BITS - 1,
+                                   use_store, structured=True)
+
+
+
+def _hybrid_check_group(p):
+    """
+    Raises:
+        ValueError: Если p короче HYBRID_MIN_P_BITS бит.
+    """
+    if p.bit_length() < HYBRID_MIN_P_BITS:
+        raise ValueError(f"гибридный режим требует p не короче {HYBRID_MIN_P_BITS} бит "
+                         f"(получено {p.bit_length()}): при коротком p ключ сеанса подбирается перебором")
+
+
+
+def _hybrid_keys(header, shared):
+    """
+    Ключ шифрования и ключ MAC сеанса: SHAKE-256 от заголовка файла
+    (с числом a) и общего секрета y^k = a^x mod p.
+    """
+    material = hashlib.shake_256(b'elgamal-hybrid' + header + shared).digest(64)
+    return material[:32], material[32:]
+
+
+
+def _hybrid_xor(enc_key, index, chunk):
+    """Порция chunk, сложенная по модулю 2 с гаммой SHAKE-256(ключ || номер порции)."""
+    gamma = hashlib.shake_256(enc_key + index.to_bytes(8, byteorder='big')).digest(len(chunk))
+    return (int.from_bytes(chunk, byteorder='big') ^ int.from_bytes(gamma, byteorder='big')).to_bytes(len(chunk), byteorder='big')
+
+
+
+def elgamal_hybrid_encrypt_file(input_path, output_path, p, g, public_key_y):
+    """
+    Шифрует файл в гибридном режиме: на файл выполняется одно шифрование
+    Эль-Гамаля (a = g^k, общий секрет y^k), из общего секрета выводятся
+    ключи сеанса, данные шифруются гаммой SHAKE-256 и защищаются
+    MAC (BLAKE2b с ключом) от заголовка и шифротекста.
+
+    Формат: HYBRID_MAGIC | ширина a (2 байта) | a | шифротекст | MAC.
+    Размер шифротекста равен размеру файла плюс постоянная добавка.
+    Группы с p короче HYBRID_MIN_P_BITS бит не принимаются
+    (см. elgamal_generate_hybrid_params).
+
+    Args:
+        input_path (str): Путь к входному файлу.
+        output_path (str): Путь к выходному файлу.
+        p (int): Простое число.
+        g (int): Первообразный корень p.
+        public_key_y (int): Публичный ключ получателя (y)
     """
     try:
+        _hybrid_check_group(p)
+        width = (p.bit_length() + 7) // 8
+        k = random.SystemRandom().randint(2, p - 2)
+        a = cl.fixed_base_pow(g, k, p)
+        shared = cl.fast_exp_mod(public_key_y, k, p).to_bytes(width, byteorder='big')
+        header = HYBRID_MAGIC + width.to_bytes(2, byteorder='big') + a.to_bytes(width, byteorder='big')
+        enc_key, mac_key = _hybrid_keys(header, shared)
+        mac = hashlib.blake2b(header, key=mac_key, digest_size=HYBRID_TAG_SIZE)
+
         with open(input_path, 'rb') as f_in, open(output_path, 'wb') as f_out:
-            while True:
-                a_bytes = f_in.read(block_size_in)
-                b_bytes = f_in.read(block_size_in)
-                if not a_bytes or not b_bytes:
-                    break
-                    
-                a = int.from_bytes(a_bytes, byteorder='big')
-                b = int.from_bytes(b_bytes, byteorder='big')
-                
-                m = cl.fast_exp_mod(a, p - 1 - private_key_x, p) * b % p
-                
-                f_out.write(m.to_bytes(1, byteorder='big'))
+            f_out.write(header)
+            for index, chunk in enumerate(block_codec.read_chunks(f_in, 1, HYBRID_CHUNK_SIZE)):
+                encrypted = _hybrid_xor(enc_key, index, chunk)
+                mac.update(encrypted)
+                f_out.write(encrypted)
+            f_out.write(mac.digest())
         return True
+
     except FileNotFoundError:
         print(f"Ошибка: Файл не найден по пути {input_path}")
         return False
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+        return False
+    except Exception as e:
+        print(f"Произошла ошибка при обработке файла: {e}")
+        return False
+
+
+
+def _hybrid_body(f_in, size):
+    """Читает size байт шифротекста порциями HYBRID_CHUNK_SIZE."""
+    while size:
+        chunk = f_in.read(min(size, HYBRID_CHUNK_SIZE))
+        if not chunk:
+            raise ValueError("файл обрезан")
+        size -= len(chunk)
+        yield chunk
+
+
+
+def elgamal_hybrid_decrypt_file(input_path, output_path, p, private_key_x):
+    """
+    Расшифровывает файл, зашифрованный elgamal_hybrid_encrypt_file.
+
+    Сначала по всему файлу проверяется MAC, и только затем данные
+    расшифровываются: при неверном ключе или поврежденном файле
+    выходной файл не создается.
+
+    Args:
+        input_path (str): Путь к зашифрованному файлу.
+        output_path (str): Путь для сохранения расшифрованного файла.
+        p (int): Публичный параметр (простое число).
+        private_key_x (int): Приватный ключ получателя (X).
+    """
+    try:
+        _hybrid_check_group(p)
+        with open(input_path, 'rb') as f_in:
+            if f_in.read(len(HYBRID_MAGIC)) != HYBRID_MAGIC:
+                raise ValueError("файл не зашифрован в гибридном режиме")
+            width_bytes = f_in.read(2)
+            width = int.from_bytes(width_bytes, byteorder='big')
+            a_bytes = f_in.read(width)
+            a = int.from_bytes(a_bytes, byteorder='big')
+            if width != (p.bit_length() + 7) // 8 or len(a_bytes) != width or not 1 < a < p:
+                raise ValueError("заголовок не соответствует ключу")
+            header = HYBRID_MAGIC + width_bytes + a_bytes
+            shared = cl.fast_exp_mod(a, private_key_x, p).to_bytes(width, byteorder='big')
+            enc_key, mac_key = _hybrid_keys(header, shared)
+
+            body_size = os.fstat(f_in.fileno()).st_size - len(header) - HYBRID_TAG_SIZE
+            if body_size < 0:
+                raise ValueError("файл обрезан")
+            mac = hashlib.blake2b(header, key=mac_key, digest_size=HYBRID_TAG_SIZE)
+            for chunk in _hybrid_body(f_in, body_size):
+                mac.update(chunk)
+            if not hmac.compare_digest(mac.digest(), f_in.read(HYBRID_TAG_SIZE)):
+                raise ValueError("MAC не совпадает: неверный ключ или файл поврежден")
+
+            f_in.seek(len(header))
+            with open(output_path, 'wb') as f_out:
+                for index, chunk in enumerate(_hybrid_body(f_in, body_size)):
+                    f_out.write(_hybrid_xor(enc_key, index, chunk))
+        return True
+
+    except FileNotFoundError:
+        print(f"Ошибка: Файл не найден по пути {input_path}")
+        return False
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+        return False
+    except Exception as e:
+        print(f"Произошла ошибка при обработке файла: {e}")
+        return False
 
 
 
@@ -115,6 +328,11 @@ def demo_elgamal():
         print(f"Ошибка ввода: {e}")
         return
 
+    print("\nВыберите режим шифрования:")
+    print("1 - Поблочный (каждый байт шифруется отдельно, файл растет в 4 раза)")
+    print(f"2 - Гибридный (ключ сеанса Эль-Гамаля + поточное шифрование с MAC, p от {HYBRID_MIN_P_BITS} бит)")
+    hybrid = input("Ваш выбор: ") == '2'
+
     print("\nВыберите способ получения параметров:")
     print("1 - Ввести p, C_a, C_b с клавиатуры")
     print("2 - Сгенерировать параметры автоматически")
@@ -123,15 +341,21 @@ def demo_elgamal():
     
     try:
         if param_choice == '1':
-            p = int(input(f"Введите простое p ({256**1} < p < {256**BLOCK_SIZE}): "))
-            if p <= 255:
-                print("Ошибка: p должно быть больше 255.")
-                return
-            if not cl.fermat_primality_test(p):
+            if hybrid:
+                p = int(input(f"Введите простое p (не короче {HYBRID_MIN_P_BITS} бит): "))
+                if p.bit_length() < HYBRID_MIN_P_BITS:
+                    print(f"Ошибка: для гибридного режима p должно быть не короче {HYBRID_MIN_P_BITS} бит.")
+                    return
+            else:
+                p = int(input(f"Введите простое p ({256**1} < p < {256**BLOCK_SIZE}): "))
+                if p <= 255:
+                    print("Ошибка: p должно быть больше 255.")
+                    return
+            if not cl.is_probable_prime(p, bpsw=True):
                 print(f"Предупреждение: {p} не является вероятно простым числом.")
 
             g = int(input("Введите число g (первообразный корень p): "))
-            if cl.fast_exp_mod(g, (p-1)/2, p) == 1:
+            if cl.fast_exp_mod(g, (p-1)//2, p) == 1:
                 print(f"Предупреждение: {g} не является вероятно первообразным корнем.")
                 
             x = int(input("Введите ключ Боба C_b: "))
@@ -139,7 +363,11 @@ def demo_elgamal():
 
         elif param_choice == '2':
             print("\nГенерация параметров...")
-            p, g, x, y = cl.elgamal_generate_params()
+            if hybrid:
+                print(f"(группа из {HYBRID_MIN_P_BITS} бит генерируется один раз и сохраняется, это может занять до минуты)")
+                p, g, x, y = elgamal_generate_hybrid_params()
+            else:
+                p, g, x, y = elgamal_generate_params()
 
         else:
             print("Неверный выбор!")
@@ -160,14 +388,20 @@ def demo_elgamal():
                 
         print("\n--- НАЧАЛО ШИФРОВАНИЯ ---")
         print(f"Шифруем '{input_file}' с использованием публичного ключа Y_b...")
-        cl.elgamal_encrypt_file(input_file, encrypted_file, p, g , y, BLOCK_SIZE)
+        if hybrid:
+            elgamal_hybrid_encrypt_file(input_file, encrypted_file, p, g, y)
+        else:
+            elgamal_encrypt_file(input_file, encrypted_file, p, g , y, BLOCK_SIZE)
         print(f"Зашифрованный файл сохранен как {encrypted_file}")
 
         print("\n--- НАЧАЛО РАСШИФРОВАНИЯ ---")
         print(f"Расшифровываем '{encrypted_file}' с использованием приватного ключа X_b...")
-        cl.elgamal_decrypt_file(encrypted_file, decrypted_file, p, x, BLOCK_SIZE)
+        if hybrid:
+            elgamal_hybrid_decrypt_file(encrypted_file, decrypted_file, p, x)
+        else:
+            elgamal_decrypt_file(encrypted_file, decrypted_file, p, x, BLOCK_SIZE)
         print(f"Расшифрованный файл сохранен как '{decrypted_file}'")
     
     except Exception as e:
         print(f"Произошла непредвиденная ошибка: {e}")
-        return -1
\ No newline at end of file
+        return -1
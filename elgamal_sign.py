@@ -5,23 +5,13 @@ import random
 
 import elgamal
 
-def elgamal_sign(input_path, sign_path, p, g, private_key, public_key):
+def _elgamal_sign_hash(hash_bytes, sign_path, p, g, private_key, public_key):
     """
-    Создает подпись для файла по схеме Эль-Гамаля.
-
-        Args:
-        input_path (str): Путь к входному файлу (файл для подписи).
-        output_path (str): Путь к выходному файлу (файл с вычисленной подписью).
-        p (int): Большое простое число.
-        g (int): Первообразный корень p.
-        private_key (int): Приватный ключ используемый только для подписи.
-        public_key (int): Публичный ключ записывается в файл для дальнейшей проверки подписи
+    Создает подпись по готовому хэшу SHA-256 (hash_bytes, bytes).
+    Общая часть elgamal_sign и elgamal_sign_stream.
     """
 
     try:
-        hash_bytes = cl.calculate_file_hash(input_path)
-        if hash_bytes is None: return False
-
         p_len = (p.bit_length() + 7) // 8
         
         with open(sign_path, 'wb') as f_sign:
@@ -37,19 +27,22 @@ def elgamal_sign(input_path, sign_path, p, g, private_key, public_key):
             f_sign.write(len(public_key_bytes).to_bytes(2, 'big'))
             f_sign.write(public_key_bytes)
 
-            for byte_of_hash in hash_bytes:
-                
-                k = 0
+            ks = []
+            for _ in hash_bytes:
                 while True:
                     k = random.randint(2, p - 2)
                     if math.gcd(k, p - 1) == 1:
                         break
+                ks.append(k)
+
+            k_invs = cl.batch_mod_inverse(ks, p - 1)
+
+            for byte_of_hash, k, k_inv in zip(hash_bytes, ks, k_invs):
                 
-                r = cl.fast_exp_mod(g, k, p)
+                r = cl.fixed_base_pow(g, k, p)
                 
                 u = (byte_of_hash - private_key * r) % (p - 1)
                 
-                k_inv = cl.mod_inverse(k, p - 1)
                 s = (k_inv * u) % (p - 1)
                 
                 f_sign.write(r.to_bytes(p_len, 'big'))
@@ -60,18 +53,48 @@ def elgamal_sign(input_path, sign_path, p, g, private_key, public_key):
         print(f"Ошибка при создании подписи Эль-Гамаля: {e}")
         return False
 
-def elgamal_check_sign(input_path, sign_path):
+
+
+def elgamal_sign(input_path, sign_path, p, g, private_key, public_key):
     """
-    Проверяет подпись файла по протоколу Эль-Гамаль.
-    
-    Args:
+    Создает подпись для файла по схеме Эль-Гамаля.
+
+        Args:
         input_path (str): Путь к входному файлу (файл для подписи).
         output_path (str): Путь к выходному файлу (файл с вычисленной подписью).
+        p (int): Большое простое число.
+        g (int): Первообразный корень p.
+        private_key (int): Приватный ключ используемый только для подписи.
+        public_key (int): Публичный ключ записывается в файл для дальнейшей проверки подписи
+    """
+    hash_bytes = cl.calculate_file_hash(input_path)
+    if hash_bytes is None: return False
+    return _elgamal_sign_hash(hash_bytes, sign_path, p, g, private_key, public_key)
+
+
+
+def elgamal_sign_stream(source, sign_path, p, g, private_key, public_key):
+    """
+    Подпись данных из потока (см. elgamal_sign).
+
+    Args:
+        source: Двоичный файловый объект, bytes/memoryview или итератор блоков bytes.
     """
     try:
-        expected_hash = cl.calculate_file_hash(input_path)
-        if expected_hash is None: return False
+        hash_bytes = cl.calculate_stream_hash(source)
+    except Exception as e:
+        print(f"Ошибка чтения данных: {e}")
+        return False
+    return _elgamal_sign_hash(hash_bytes, sign_path, p, g, private_key, public_key)
+
 
+
+def _elgamal_check_sign_hash(expected_hash, sign_path):
+    """
+    Проверяет подпись по готовому хэшу SHA-256 (expected_hash, bytes).
+    Общая часть elgamal_check_sign и elgamal_check_sign_stream.
+    """
+    try:
         with open(sign_path, 'rb') as f_sign:
             p_len = int.from_bytes(f_sign.read(2), 'big')
             p = int.from_bytes(f_sign.read(p_len), 'big')
@@ -94,9 +117,7 @@ def elgamal_check_sign(input_path, sign_path):
                 r_byte_int = int.from_bytes(r_byte, 'big')
                 s_byte_int = int.from_bytes(s_byte, 'big')
                 
-                left_part1 = cl.fast_exp_mod(public_key, r_byte_int, p)
-                left_part2 = cl.fast_exp_mod(r_byte_int, s_byte_int, p)
-                left = (left_part1 * left_part2) % p
+                left = cl.multi_exp_mod((public_key, r_byte_int), (r_byte_int, s_byte_int), p)
 
                 right = cl.fast_exp_mod(g, byte_of_hash, p)
 
@@ -116,7 +137,7 @@ def elgamal_check_sign(input_path, sign_path):
             return False
     
     except FileNotFoundError:
-        print(f"Ошибка: Файл не найден по пути {input_path}")
+        print(f"Ошибка: Файл не найден по пути {sign_path}")
         return False
     except Exception as public_key:
         print(f"Произошла ошибка при обработке файла: {public_key}")
@@ -124,6 +145,36 @@ def elgamal_check_sign(input_path, sign_path):
 
 
 
+def elgamal_check_sign(input_path, sign_path):
+    """
+    Проверяет подпись файла по протоколу Эль-Гамаль.
+    
+    Args:
+        input_path (str): Путь к входному файлу (файл для подписи).
+        output_path (str): Путь к выходному файлу (файл с вычисленной подписью).
+    """
+    expected_hash = cl.calculate_file_hash(input_path)
+    if expected_hash is None: return False
+    return _elgamal_check_sign_hash(expected_hash, sign_path)
+
+
+
+def elgamal_check_sign_stream(source, sign_path):
+    """
+    Проверка подписи данных из потока (см. elgamal_check_sign).
+
+    Args:
+        source: Двоичный файловый объект, bytes/memoryview или итератор блоков bytes.
+    """
+    try:
+        expected_hash = cl.calculate_stream_hash(source)
+    except Exception as e:
+        print(f"Ошибка чтения данных: {e}")
+        return False
+    return _elgamal_check_sign_hash(expected_hash, sign_path)
+
+
+
 def demo_elgamal_sign():
     """
     Единый процесс демонстрации электронной подписи Эль-Гамаля.
@@ -3,41 +3,25 @@ import math
 import os
 import random
 
-def fips_generate_params(q_bits = 160, p_bits = 1024):
+import param_store
+
+def fips_generate_group(q_bits = 160, p_bits = 1024, workers = None):
     """
-    Генерирует параметры для электронной подписи FIPS 186.
+    Генерирует параметры группы для электронной подписи FIPS 186.
     q = 160 бит, p = 1024 бит, p = b*q+1
+    Поиск q и p распределяется по workers процессам (см. cl.generate_dsa_group).
 
     Returns:
-        tuple: Кортеж, содержащий:
-            - q (int): Простое число длинной 256 бит (или q_bits).
-            - p (int): Простое число длинной 1024 бит (или p_bits).
-            - a (int): a^q mod p == 1 (или a = g^b mod p).
-            - public_key (int): Публичный ключ (y).
-            - private_key (int): Секретный ключ (x).
+        dict: Параметры группы {'q', 'p', 'a'}, где a^q mod p == 1 (a = g^b mod p).
     """
     
-    q = cl.generate_prime_bits(q_bits)
+    q, p, b = cl.generate_dsa_group(q_bits, p_bits, workers)
     
     # Отладка
     # print(f"q = {q}")
     # print(f"Длина q: {q.bit_length()} бит\n")
-    
-    min_b = (2**(p_bits-1) - 1) // q
-    max_b = (2**p_bits - 2) // q
-
-    while True:
-        b = random.randint(min_b, max_b)
-
-        p = b * q + 1
-
-        if cl.fermat_primality_test(p) and p.bit_length() == p_bits:
-            # # Отладка
-            # print(f"b = {b}")
-            # print(f"Длина b: {b.bit_length()} бит\n")
-            # print(f"p = {p}")
-            # print(f"Длина p: {p.bit_length()} бит\n")
-            break
+    # print(f"p = {p}")
+    # print(f"Длина p: {p.bit_length()} бит\n")
     
     while True:
         g = random.randint(2, p-2)
@@ -48,9 +32,41 @@ def fips_generate_params(q_bits = 160, p_bits = 1024):
             # print(f"a = {a}")
             # print(f"Длина a: {a.bit_length()} бит\n")
             break
+
+    return {'q': q, 'p': p, 'a': a}
+
+
+
+def fips_generate_params(q_bits = 160, p_bits = 1024, workers = None, use_store = True):
+    """
+    Генерирует параметры для электронной подписи FIPS 186.
+    q = 160 бит, p = 1024 бит, p = b*q+1
+    При use_store группа (q, p, a) берется из хранилища параметров (param_store)
+    и генерируется только при первом вызове; ключи генерируются каждый раз.
+    Таблица степеней a (cl.FixedBaseTable) хранится там же и загружается
+    вместе с группой.
+
+    Returns:
+        tuple: Кортеж, содержащий:
+            - q (int): Простое число длинной 160 бит (или q_bits).
+            - p (int): Простое число длинной 1024 бит (или p_bits).
+            - a (int): a^q mod p == 1 (или a = g^b mod p).
+            - public_key (int): Публичный ключ (y).
+            - private_key (int): Секретный ключ (x).
+    """
+    
+    if use_store:
+        group = param_store.get_or_generate(
+            'fips', f'{q_bits}-{p_bits}',
+            lambda: fips_generate_group(q_bits, p_bits, workers),
+            param_store.dsa_group_validator(q_bits, p_bits))
+        param_store.load_fixed_base_table('fips', f'{q_bits}-{p_bits}', group['a'], group['p'], q_bits)
+    else:
+        group = fips_generate_group(q_bits, p_bits, workers)
+    q, p, a = group['q'], group['p'], group['a']
     
     private_key = random.randint(1, q-1)
-    public_key = cl.fast_exp_mod(a, private_key, p)
+    public_key = cl.fixed_base_pow(a, private_key, p)
 
     # print(f"public = {public_key}")
     # print(f"Длина: {public_key.bit_length()} бит\n")
@@ -61,23 +77,13 @@ def fips_generate_params(q_bits = 160, p_bits = 1024):
 
 
 
-def fips_sign(input_path, sign_path, q, p, a, public_key, private_key):
+def _fips_sign_hash(file_hash, sign_path, q, p, a, public_key, private_key):
     """
-    Создает подпись для файла по схеме FIPS 186.
-
-    Args:
-        input_path (str): Путь к входному файлу (файл для подписи).
-        output_path (str): Путь к выходному файлу (файл с вычисленной подписью).
-        q (int): Простое число (128 бит).
-        p (int): Простое число (1024 бит).
-        public_key (int): Публичный ключ записывается в файл для дальнейшей проверки подписи.
-        private_key (int): Приватный ключ используемый только для подписи.
+    Создает подпись по готовому хэшу SHA-1 (file_hash, bytes).
+    Общая часть fips_sign и fips_sign_stream.
     """
 
     try:
-        file_hash = cl.file_hash_sha1(input_path)
-        if file_hash is None: return False
-
         hash_as_int = int.from_bytes(file_hash, 'big')
 
         if hash_as_int >= q:
@@ -109,7 +115,7 @@ def fips_sign(input_path, sign_path, q, p, a, public_key, private_key):
             while True:
                 k = random.randint(1, q - 1)
                 k_inv = cl.mod_inverse(k, q)
-                r = cl.fast_exp_mod(a, k, p) % q
+                r = cl.fixed_base_pow(a, k, p) % q
                 if r != 0:
                     s = (k_inv*(hash_as_int + private_key*r)) % q
                     if s != 0:
@@ -120,7 +126,7 @@ def fips_sign(input_path, sign_path, q, p, a, public_key, private_key):
         return True
     
     except FileNotFoundError:
-        print(f"Ошибка: Файл не найден по пути {input_path}")
+        print(f"Ошибка: Файл не найден по пути {sign_path}")
         return False
     except Exception as e:
         print(f"Произошла ошибка при обработке файла: {e}")
@@ -128,19 +134,47 @@ def fips_sign(input_path, sign_path, q, p, a, public_key, private_key):
 
 
 
-def fips_check_sign(input_path, sign_path):
+def fips_sign(input_path, sign_path, q, p, a, public_key, private_key):
     """
-    Проверяет подпись файла по протоколу FIPS 186
-    
+    Создает подпись для файла по схеме FIPS 186.
+
     Args:
         input_path (str): Путь к входному файлу (файл для подписи).
         output_path (str): Путь к выходному файлу (файл с вычисленной подписью).
+        q (int): Простое число (128 бит).
+        p (int): Простое число (1024 бит).
+        public_key (int): Публичный ключ записывается в файл для дальнейшей проверки подписи.
+        private_key (int): Приватный ключ используемый только для подписи.
+    """
+    file_hash = cl.file_hash_sha1(input_path)
+    if file_hash is None: return False
+    return _fips_sign_hash(file_hash, sign_path, q, p, a, public_key, private_key)
+
+
+
+def fips_sign_stream(source, sign_path, q, p, a, public_key, private_key):
+    """
+    Подпись данных из потока (см. fips_sign).
+
+    Args:
+        source: Двоичный файловый объект, bytes/memoryview или итератор блоков bytes.
     """
-    
     try:
-        file_hash = cl.file_hash_sha1(input_path)
-        if file_hash is None: return False
+        file_hash = cl.stream_hash_sha1(source)
+    except Exception as e:
+        print(f"Ошибка чтения данных: {e}")
+        return False
+    return _fips_sign_hash(file_hash, sign_path, q, p, a, public_key, private_key)
+
 
+
+def _fips_check_sign_hash(file_hash, sign_path):
+    """
+    Проверяет подпись по готовому хэшу SHA-1 (file_hash, bytes).
+    Общая часть fips_check_sign и fips_check_sign_stream.
+    """
+    
+    try:
         hash_as_int = int.from_bytes(file_hash, 'big')
 
         with open(sign_path, 'rb') as f_sign:
@@ -182,7 +216,7 @@ def fips_check_sign(input_path, sign_path):
             u2 = (r_int * s_inv) % q
 
             # v = ((a**u1 * public_key**u2) % p) % q
-            v = (cl.fast_exp_mod(a, u1, p) * cl.fast_exp_mod(public_key, u2, p) % p) % q
+            v = cl.multi_exp_mod((a, public_key), (u1, u2), p) % q
 
         if v == r_int:
             print("\n" + "=" * 50)
@@ -198,7 +232,7 @@ def fips_check_sign(input_path, sign_path):
 
 
     except FileNotFoundError:
-        print(f"Ошибка: Файл не найден по пути {input_path} или {sign_path}")
+        print(f"Ошибка: Файл не найден по пути {sign_path}")
         return False
     except Exception as e:
         print(f"Произошла ошибка при обработке файла: {e}")
@@ -206,6 +240,36 @@ def fips_check_sign(input_path, sign_path):
 
 
 
+def fips_check_sign(input_path, sign_path):
+    """
+    Проверяет подпись файла по протоколу FIPS 186
+    
+    Args:
+        input_path (str): Путь к входному файлу (файл для подписи).
+        output_path (str): Путь к выходному файлу (файл с вычисленной подписью).
+    """
+    file_hash = cl.file_hash_sha1(input_path)
+    if file_hash is None: return False
+    return _fips_check_sign_hash(file_hash, sign_path)
+
+
+
+def fips_check_sign_stream(source, sign_path):
+    """
+    Проверка подписи данных из потока (см. fips_check_sign).
+
+    Args:
+        source: Двоичный файловый объект, bytes/memoryview или итератор блоков bytes.
+    """
+    try:
+        file_hash = cl.stream_hash_sha1(source)
+    except Exception as e:
+        print(f"Ошибка чтения данных: {e}")
+        return False
+    return _fips_check_sign_hash(file_hash, sign_path)
+
+
+
 def demo_fips_sign():
     """
     Единый процесс демонстрации электронной подписи FIPS 186.
@@ -0,0 +1,155 @@
+import collections
+import hashlib
+import mmap
+import os
+import threading
+
+# Размер буфера чтения: один bytearray переиспользуется для всего файла
+HASH_BUFFER_SIZE = 1 << 20
+
+# Максимальное количество файлов в кэше хэшей
+DIGEST_CACHE_SIZE = 128
+
+# (путь, inode, размер, mtime_ns) -> {алгоритм: хэш}
+_digest_cache = collections.OrderedDict()
+_digest_cache_lock = threading.Lock()
+
+
+
+def _file_key(path):
+    """
+    Ключ кэша: файл считается неизменным, пока совпадают inode, размер и
+    время изменения в наносекундах.
+    """
+    st = os.stat(path)
+    return (os.path.realpath(path), st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+
+def _hash_file(path, algorithms, use_mmap):
+    """Один проход по файлу с обновлением всех хэшей из algorithms."""
+    hashers = [hashlib.new(name) for name in algorithms]
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if use_mmap and size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for offset in range(0, size, HASH_BUFFER_SIZE):
+                        chunk = view[offset:offset + HASH_BUFFER_SIZE]
+                        for h in hashers:
+                            h.update(chunk)
+                        chunk.release()
+                finally:
+                    view.release()
+        else:
+            buffer = bytearray(HASH_BUFFER_SIZE)
+            view = memoryview(buffer)
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                for h in hashers:
+                    h.update(view[:n])
+    return {name: h.digest() for name, h in zip(algorithms, hashers)}
+
+
+
+def file_digests(path, algorithms=('sha256',), use_mmap=False, use_cache=True):
+    """
+    Вычисляет несколько хэшей файла за один проход.
+
+    Файл читается большими блоками в один переиспользуемый буфер (или
+    отображается в память при use_mmap), каждый блок передается всем
+    хэш-функциям сразу. Результаты запоминаются в LRU-кэше по
+    (путь, inode, размер, mtime_ns), поэтому подпись и последующая
+    проверка того же файла читают его один раз. Если часть алгоритмов уже
+    есть в кэше, файл читается только ради недостающих.
+
+    Args:
+        path (str): Путь к файлу.
+        algorithms (iterable): Имена алгоритмов hashlib ('sha256', 'sha1', ...).
+        use_mmap (bool): Читать файл через mmap.
+        use_cache (bool): Использовать кэш хэшей.
+
+    Returns:
+        dict: {алгоритм: хэш (bytes)}.
+
+    Raises:
+        FileNotFoundError: Если файл не найден.
+    """
+
+    algorithms = tuple(algorithms)
+    if not use_cache:
+        return _hash_file(path, algorithms, use_mmap)
+
+    key = _file_key(path)
+    with _digest_cache_lock:
+        cached = _digest_cache.get(key)
+        if cached is not None:
+            _digest_cache.move_to_end(key)
+            cached = dict(cached)
+    cached = cached or {}
+
+    missing = tuple(name for name in algorithms if name not in cached)
+    if missing:
+        cached.update(_hash_file(path, missing, use_mmap))
+        # Файл мог измениться во время чтения - тогда результат не кэшируется
+        if _file_key(path) == key:
+            with _digest_cache_lock:
+                _digest_cache[key] = cached
+                _digest_cache.move_to_end(key)
+                while len(_digest_cache) > DIGEST_CACHE_SIZE:
+                    _digest_cache.popitem(last=False)
+
+    return {name: cached[name] for name in algorithms}
+
+
+
+def stream_digests(source, algorithms=('sha256',)):
+    """
+    Вычисляет несколько хэшей потока данных за один проход, не сохраняя
+    данные на диск (например, данные из сокета или канала).
+
+    Args:
+        source: Двоичный файловый объект (readinto или read), bytes/bytearray/
+                memoryview или итерируемый объект с блоками bytes.
+        algorithms (iterable): Имена алгоритмов hashlib.
+
+    Returns:
+        dict: {алгоритм: хэш (bytes)}.
+    """
+
+    algorithms = tuple(algorithms)
+    hashers = [hashlib.new(name) for name in algorithms]
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        for h in hashers:
+            h.update(source)
+    elif hasattr(source, 'readinto'):
+        buffer = bytearray(HASH_BUFFER_SIZE)
+        view = memoryview(buffer)
+        while True:
+            n = source.readinto(buffer)
+            if not n:
+                break
+            for h in hashers:
+                h.update(view[:n])
+    elif hasattr(source, 'read'):
+        while True:
+            chunk = source.read(HASH_BUFFER_SIZE)
+            if not chunk:
+                break
+            for h in hashers:
+                h.update(chunk)
+    else:
+        for chunk in source:
+            for h in hashers:
+                h.update(chunk)
+    return {name: h.digest() for name, h in zip(algorithms, hashers)}
+
+
+
+def clear_digest_cache():
+    """Очищает кэш хэшей файлов."""
+    with _digest_cache_lock:
+        _digest_cache.clear()
@@ -0,0 +1,209 @@
+import contextlib
+import functools
+import json
+import sys
+import threading
+import time
+
+import crypt_lib as cl
+import primality
+import rsa
+
+# Инструментируемые функции и методы ("Класс.метод"): имя -> функция,
+# возвращающая битность операнда (модуля или проверяемого числа) по
+# аргументам вызова
+INSTRUMENTED = {
+    'fast_exp_mod': lambda a, x, p, *_, **__: p.bit_length(),
+    'fixed_base_pow': lambda base, exponent, modulus, *_, **__: modulus.bit_length(),
+    'multi_exp_mod': lambda bases, exponents, p, *_, **__: p.bit_length(),
+    'mod_inverse': lambda n, modulus, *_, **__: modulus.bit_length(),
+    'batch_mod_inverse': lambda values, modulus, *_, **__: modulus.bit_length(),
+    'fermat_primality_test': lambda n, *_, **__: n.bit_length(),
+    'is_probable_prime': lambda n, *_, **__: n.bit_length(),
+    # Возведения в степень, которые выполняются встроенным pow внутри
+    # методов и не проходят через функции выше
+    'ModContext.pow': lambda self, *_, **__: self.modulus.bit_length(),
+    'ModContext.pow_many': lambda self, *_, **__: self.modulus.bit_length(),
+    'FixedBaseTable.pow': lambda self, *_, **__: self.modulus.bit_length(),
+    'RSAPrivateKey.pow': lambda self, *_, **__: self.n.bit_length(),
+    '_build_pow_table': lambda modulus, *_, **__: modulus.bit_length(),
+}
+
+# Вызовы, выполняющие сразу несколько возведений в степень: имя -> функция,
+# возвращающая их количество (остальные вызовы считаются за одну операцию)
+BATCH_SIZES = {
+    'ModContext.pow_many': lambda self, bases, *_, **__: len(bases),
+    '_build_pow_table': lambda modulus, *_, **__: modulus,
+}
+
+# Модули, в которых ищутся функции и классы (is_probable_prime импортирован
+# в crypt_lib по имени, поэтому подменяется в обоих)
+_TARGETS = (cl, primality, rsa)
+
+# функция -> вызывающий ("модуль.функция") -> [вызовы, время в нс, {корзина битности: вызовы}]
+_stats = {}
+_stats_lock = threading.Lock()
+
+# (модуль или класс, имя атрибута) -> исходная функция, пока инструментация включена
+_originals = {}
+
+
+
+def _bits_bucket(bits):
+    """Корзина гистограммы: битность, округленная вверх до степени двойки."""
+    return 1 << (bits - 1).bit_length() if bits > 1 else bits
+
+
+
+def _wrap(name, func, bits_of):
+    count_of = BATCH_SIZES.get(name)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            frame = sys._getframe(1)
+            caller = f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+            try:
+                bucket = _bits_bucket(bits_of(*args, **kwargs))
+            except (AttributeError, TypeError):
+                bucket = 0
+            try:
+                count = count_of(*args, **kwargs) if count_of else 1
+            except TypeError:
+                count = 1
+            with _stats_lock:
+                entry = _stats.setdefault(name, {}).get(caller)
+                if entry is None:
+                    entry = _stats[name][caller] = [0, 0, {}]
+                entry[0] += count
+                entry[1] += elapsed
+                entry[2][bucket] = entry[2].get(bucket, 0) + count
+    wrapper.__wrapped_original__ = func
+    return wrapper
+
+
+
+def _owners(name):
+    """Объекты (модули или классы), в которых подменяется name, и имя атрибута."""
+    class_name, _, attr = name.rpartition('.')
+    if not class_name:
+        return [module for module in _TARGETS if hasattr(module, attr)], attr
+    return [getattr(module, class_name) for module in _TARGETS
+            if isinstance(getattr(module, class_name, None), type)], attr
+
+
+
+def enable(names=None):
+    """
+    Включает сбор статистики: функции crypt_lib (и primality) и методы
+    ModContext, FixedBaseTable, RSAPrivateKey подменяются обертками,
+    которые считают возведения в степень (вызовы), суммарное время и
+    гистограмму битности операндов отдельно для каждого вызывающего.
+    ModContext.pow_many и построение таблицы степеней (_build_pow_table)
+    учитываются как столько операций, сколько чисел они возводят в степень.
+
+    Пока инструментация выключена, в модулях стоят исходные функции, и
+    накладных расходов нет. Вызовы через ссылки, сохраненные до enable
+    (например, from crypt_lib import fast_exp_mod или ctx.pow, взятый
+    заранее), не учитываются.
+
+    Args:
+        names (iterable): Имена функций из INSTRUMENTED (по умолчанию все).
+    """
+
+    for name in names or INSTRUMENTED:
+        bits_of = INSTRUMENTED[name]
+        owners, attr = _owners(name)
+        for owner in owners:
+            key = (owner, attr)
+            if key in _originals:
+                continue
+            original = owner.__dict__[attr] if isinstance(owner, type) else getattr(owner, attr)
+            _originals[key] = original
+            setattr(owner, attr, _wrap(name, original, bits_of))
+
+
+
+def disable():
+    """Возвращает исходные функции. Собранная статистика сохраняется."""
+    for (owner, attr), original in list(_originals.items()):
+        setattr(owner, attr, original)
+    _originals.clear()
+
+
+
+def is_enabled():
+    return bool(_originals)
+
+
+
+def snapshot():
+    """
+    Копия собранной статистики, пригодная для json.dumps.
+
+    Returns:
+        dict: {функция: {вызывающий: {'calls': int, 'time_ms': float,
+               'bits': {битность: вызовы}}}}. Битность округлена вверх
+               до степени двойки.
+    """
+    with _stats_lock:
+        return {
+            name: {
+                caller: {
+                    'calls': calls,
+                    'time_ms': elapsed / 1e6,
+                    'bits': {str(bucket): count for bucket, count in sorted(bits.items())},
+                }
+                for caller, (calls, elapsed, bits) in callers.items()
+            }
+            for name, callers in _stats.items()
+        }
+
+
+
+def reset():
+    """Обнуляет собранную статистику."""
+    with _stats_lock:
+        _stats.clear()
+
+
+
+def export_json(path):
+    """Записывает snapshot() в файл JSON."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot(), f, indent=2, ensure_ascii=False)
+
+
+
+def print_report(stats=None):
+    """Печатает статистику: по строке на пару (функция, вызывающий)."""
+    stats = snapshot() if stats is None else stats
+    print(f"{'функция':<22} {'вызывающий':<40} {'вызовы':>8} {'время, мс':>11}  битность")
+    for name, callers in sorted(stats.items()):
+        for caller, entry in sorted(callers.items(), key=lambda item: -item[1]['time_ms']):
+            bits = ", ".join(f"{b}: {c}" for b, c in entry['bits'].items())
+            print(f"{name:<22} {caller:<40} {entry['calls']:>8} {entry['time_ms']:>11.2f}  {bits}")
+
+
+
+@contextlib.contextmanager
+def instrumented(names=None):
+    """
+    Включает инструментацию на время блока with и выключает после,
+    если она не была включена раньше.
+
+        with instrumentation.instrumented():
+            gost.gost_sign(...)
+        instrumentation.print_report()
+    """
+    was_enabled = is_enabled()
+    enable(names)
+    try:
+        yield
+    finally:
+        if not was_enabled:
+            disable()
@@ -1,7 +1,8 @@
 from flask import Flask, render_template, request
 from flask_socketio import SocketIO, emit, join_room
 import random
-from mental_poker_game import MentalPokerGame
+import os
+from mental_poker_game import MentalPokerGame, create_prime_pool
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'mental_poker_secret_key'
@@ -10,6 +11,9 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 # Одна игровая комната
 mental_poker_game = None
 
+# Пул простых для новых игр (потоки запускаются в __main__)
+prime_pool = create_prime_pool()
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -21,7 +25,7 @@ def handle_connect():
     
     if mental_poker_game is None:
         # Передаем экземпляр socketio в игру при создании
-        mental_poker_game = MentalPokerGame(socketio)
+        mental_poker_game = MentalPokerGame(socketio, prime_pool)
         print("A new mental poker game has been created.")
     
     player_name = f"Player_{random.randint(100, 999)}"
@@ -84,4 +88,9 @@ def handle_submit_keys(data):
         mental_poker_game.handle_player_keys(player_id, key_c, key_d)
 
 if __name__ == '__main__':
+    # С debug=True werkzeug выполняет этот блок дважды: в следящем процессе
+    # и в перезапущенном дочернем (WERKZEUG_RUN_MAIN), который обслуживает
+    # запросы. Пул нужен только дочернему
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        prime_pool.start()
     socketio.run(app, debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -1,11 +1,26 @@
 import random
-import sympy
 from datetime import datetime
 import os
+import sys
+
+# Общая библиотека crypt_lib лежит в корне репозитория
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import crypt_lib as cl
+
+# Битность Q в паре Софи Жермен (P = 2Q + 1)
+PRIME_BITS = 32
+
+def create_prime_pool(capacity=2):
+    """
+    Пул crypt_lib.PrimePool с парами (P, Q) для новых игр. Потоки пула
+    запускаются явно (start) в процессе, который обслуживает запросы.
+    """
+    return cl.PrimePool(safe_prime_bits=(PRIME_BITS + 1,), capacity=capacity)
 
 class MentalPokerGame:
-    def __init__(self, socketio):
+    def __init__(self, socketio, prime_pool=None):
         self.socketio = socketio
+        self.prime_pool = prime_pool
         self.room_id = "main"
         self.players = {}
         self.player_order = []
@@ -69,11 +84,11 @@ Game Start: {self.game_start_time.strftime("%Y-%m-%d %H:%M:%S")}
     def can_start_game(self):
         return len(self.players) >= 2
 
-    def generate_sophie_germain_prime(self, bits=32):
-        while True:
-            q = sympy.randprime(2**(bits-1), 2**bits)
-            p = 2 * q + 1
-            if sympy.isprime(p): return p, q
+    def generate_sophie_germain_prime(self, bits=PRIME_BITS):
+        # Готовая пара из пула; без пула (или для другой битности) - генерация сразу
+        if self.prime_pool is not None:
+            return self.prime_pool.get_safe_prime(bits + 1)
+        return cl.generate_safe_prime(2**bits, 2**(bits + 1) - 1)
 
     def initialize_deck(self):
         suits = ['♠', '♥', '♦', '♣']
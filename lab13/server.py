@@ -3,39 +3,63 @@ import math
 import hashlib
 import crypt_lib as cl
 
-def rsa_generate_params(min_p=255, max_p=65535):
+def rsa_generate_params(min_p=255, max_p=65535, return_primes=False, public_key=None):
     """
     Генерирует полный набор параметров для протокола RSA.
     (Код предоставлен в условии)
+
+    При return_primes дополнительно возвращаются множители p и q
+    (для подписи по китайской теореме об остатках).
+    При заданном public_key (например, 65537) открытый ключ не выбирается
+    случайно, а p и q подбираются так, чтобы он был взаимно прост с phi.
     """
     while True:
-        p_candidate = random.randint(min_p, max_p)
-        if cl.fermat_primality_test(p_candidate):
-            p = p_candidate
-            break
+        while True:
+            p_candidate = random.randint(min_p, max_p)
+            if cl.fermat_primality_test(p_candidate):
+                p = p_candidate
+                break
 
-    while True:
-        q_candidate = random.randint(min_p, max_p)
-        if cl.fermat_primality_test(q_candidate) and q_candidate != p:
-            q = q_candidate
+        while True:
+            q_candidate = random.randint(min_p, max_p)
+            if cl.fermat_primality_test(q_candidate) and q_candidate != p:
+                q = q_candidate
+                break
+
+        phi = (p-1)*(q-1)
+        if public_key is None or math.gcd(public_key, phi) == 1:
             break
         
     n_big = p*q
 
-    phi = (p-1)*(q-1)
-    while True:
+    while public_key is None:
         d_candidate = random.randint(2, phi - 1)
         if math.gcd(d_candidate, phi) == 1:
             public_key = d_candidate
-            break
 
     private_key = cl.mod_inverse(public_key, phi)
 
+    if return_primes:
+        return n_big, public_key, private_key, p, q
     return n_big, public_key, private_key
 
+# Подпись по КТО (с проверкой) быстрее одного pow(x, C, N) только для N
+# от этой длины; на коротких N вызовы pow обходятся дороже самих вычислений
+CRT_MIN_BITS = 128
+
+# Открытый ключ сервера: проверка подписи (в том числе проверка результата
+# КТО в _sign) стоит 17 умножений вместо полного возведения в степень
+SERVER_PUBLIC_KEY = 65537
+
 class VotingServer:
     def __init__(self):
-        self.N, self.D, self.C = rsa_generate_params(min_p=1000, max_p=50000)
+        self.N, self.D, self.C, self.P, self.Q = rsa_generate_params(
+            min_p=1000, max_p=50000, return_primes=True, public_key=SERVER_PUBLIC_KEY)
+
+        # Параметры для подписи по китайской теореме об остатках
+        self.C_P = self.C % (self.P - 1)
+        self.C_Q = self.C % (self.Q - 1)
+        self.Q_INV = cl.mod_inverse(self.Q, self.P)
         
         self.voters_who_received_ballots = set()
         
@@ -45,6 +69,24 @@ class VotingServer:
         """Возвращает открытые данные (N, D)."""
         return self.N, self.D
 
+    def _sign(self, x):
+        """
+        Вычисляет x^C mod N по китайской теореме об остатках: два возведения
+        в степень по модулям P и Q вместо одного по модулю N (для N короче
+        CRT_MIN_BITS - одним pow(x, C, N)).
+        Перед выдачей подпись проверяется открытым ключом (s^D mod N == x):
+        подпись, искаженная сбоем в одном из остатков, позволила бы разложить N.
+        При несовпадении подпись вычисляется заново обычным pow(x, C, N).
+        """
+        if self.N.bit_length() < CRT_MIN_BITS:
+            return pow(x, self.C, self.N)
+        s_p = pow(x, self.C_P, self.P)
+        s_q = pow(x, self.C_Q, self.Q)
+        s = s_q + ((self.Q_INV * (s_p - s_q)) % self.P) * self.Q
+        if pow(s, self.D, self.N) != x % self.N:
+            s = pow(x, self.C, self.N)
+        return s
+
     def sign_blind_ballot(self, voter_id, blind_hash):
         """
         Этап 1: Сервер подписывает зашифрованный (слепой) хеш бюллетеня.
@@ -55,7 +97,7 @@ class VotingServer:
         
         self.voters_who_received_ballots.add(voter_id)
         
-        s_prime = pow(blind_hash, self.C, self.N)
+        s_prime = self._sign(blind_hash)
         
         return s_prime
 
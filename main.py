@@ -1,36 +1,308 @@
-import random
-import crypt_lib as cl
+import argparse
+import importlib
+import json
 import os
-import math
-
-import bsgs
-import diffie_hellman
-import shamir
-import elgamal
-import rsa
-import vernam
-import rsa_sign
-import rsa_sign_big
-import elgamal_sign
-import gost
-import fips
-
-def main():
+import shutil
+import sys
+
+# Пункт меню -> (название, модуль, функция демонстрации).
+# Модули импортируются только при выборе пункта (load_algorithm), поэтому
+# запуск меню и командной строки не ждет импорта всех алгоритмов.
+ALGORITHMS = {
+    '1': ("Дискретный логарифм ('Шаг младенца, шаг великана')", 'bsgs', 'demo_bsgs'),
+    '2': ("Обмен ключами Диффи-Хеллмана", 'diffie_hellman', 'demo_diffie_hellman'),
+    '3': ("Шифр Шамира", 'shamir', 'demo_shamir'),
+    '4': ("Шифр Эль-Гамаля", 'elgamal', 'demo_elgamal'),
+    '5': ("Шифр RSA", 'rsa', 'demo_rsa'),
+    '6': ("Шифр Вернама", 'vernam', 'demo_vernam'),
+    # '7': ("Подпись/Проверка RSA", 'rsa_sign', 'demo_rsa_sign'),
+    '7': ("Подпись/Проверка RSA", 'rsa_sign_big', 'demo_rsa_sign'),
+    '8': ("Подпись Эль-Гамаля", 'elgamal_sign', 'demo_elgamal_sign'),
+    '9': ("Подпись ГОСТ Р 34.10-94", 'gost', 'demo_gost_sign'),
+    '10': ("Подпись FIPS 186", 'fips', 'demo_fips_sign'),
+}
+
+CIPHERS = ('rsa', 'elgamal', 'vernam')
+SIGNATURES = ('rsa', 'elgamal', 'gost', 'fips')
+
+
+
+def load_algorithm(module_name):
+    """Импортирует модуль алгоритма при первом обращении."""
+    return importlib.import_module(module_name)
+
+
+
+def _load_or_create_key(path, algorithm, generate):
+    """
+    Читает параметры ключа из файла JSON или, если файла нет, генерирует
+    их (generate() -> dict имя -> int) и сохраняет.
+
+    Returns:
+        dict: Параметры ключа (имя -> int).
+    """
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+        if record.get('algorithm') != algorithm:
+            raise ValueError(f"Файл {path} содержит ключ {record.get('algorithm')}, а не {algorithm}")
+        return {name: int(value, 16) for name, value in record['params'].items()}
+
+    params = generate()
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'algorithm': algorithm,
+                   'params': {name: format(value, 'x') for name, value in params.items()}}, f, indent=2)
+    print(f"Создан новый ключ {algorithm}: {path}", file=sys.stderr)
+    return params
+
+
+
+def _rsa_key(path, bits, primes):
+    rsa = load_algorithm('rsa')
+    if os.path.exists(path):
+        return rsa.RSAPrivateKey.load(path)
+    key = rsa.rsa_generate_key_bits(bits, primes)
+    key.save(path)
+    print(f"Создан новый ключ rsa: {path}", file=sys.stderr)
+    return key
+
+
+
+def _elgamal_key(path, hybrid=False):
+    elgamal = load_algorithm('elgamal')
+    def generate():
+        if hybrid:
+            p, g, x, y = elgamal.elgamal_generate_hybrid_params()
+        else:
+            p, g, x, y = elgamal.elgamal_generate_params()
+        return {'p': p, 'g': g, 'x': x, 'y': y}
+    return _load_or_create_key(path, 'elgamal', generate)
+
+
+
+def _vernam_key(path):
+    diffie_hellman = load_algorithm('diffie_hellman')
+    def generate():
+        p, g, secret_a, secret_b = diffie_hellman.generate_diffie_hellman_strong_params()
+        _, _, key, _ = diffie_hellman.diffie_hellman_exchange(p, g, secret_a, secret_b)
+        return {'key': key}
+    return _load_or_create_key(path, 'vernam', generate)
+
+
+
+def _dsa_key(path, algorithm):
+    module = load_algorithm(algorithm)
+    generate_params = getattr(module, f'{algorithm}_generate_params')
+    def generate():
+        q, p, a, public_key, private_key = generate_params()
+        return {'q': q, 'p': p, 'a': a, 'public_key': public_key, 'private_key': private_key}
+    return _load_or_create_key(path, algorithm, generate)
+
+
+
+def _encrypt_with_size(process, input_path, output_path):
+    """
+    Шифрует файл блоками: в начало выходного файла записывается исходный
+    размер (8 байт), чтобы при расшифровании отбросить дополнение.
+    """
+    tmp_path = output_path + ".temp_content"
+    try:
+        if not process(input_path, tmp_path):
+            return False
+        with open(output_path, 'wb') as f_out, open(tmp_path, 'rb') as f_tmp:
+            f_out.write(os.path.getsize(input_path).to_bytes(8, byteorder='big'))
+            shutil.copyfileobj(f_tmp, f_out)
+        return True
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+
+def _decrypt_with_size(process, input_path, output_path):
+    """Обратная операция к _encrypt_with_size: process(путь, путь, исходный размер)."""
+    tmp_path = output_path + ".temp_content"
+    try:
+        with open(input_path, 'rb') as f_in, open(tmp_path, 'wb') as f_tmp:
+            original_size = int.from_bytes(f_in.read(8), byteorder='big')
+            shutil.copyfileobj(f_in, f_tmp)
+        return process(tmp_path, output_path, original_size)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+
+def cmd_encrypt(args):
+    if args.algorithm == 'rsa':
+        rsa = load_algorithm('rsa')
+        key = _rsa_key(args.key, args.bits, args.primes)
+        size_out = (key.n.bit_length() + 7) // 8
+        return _encrypt_with_size(
+            lambda src, dst: rsa.rsa_process_file(src, dst, key.n, key.e, size_out - 1, size_out),
+            args.input, args.output)
+    if args.algorithm == 'elgamal':
+        elgamal = load_algorithm('elgamal')
+        key = _elgamal_key(args.key, args.hybrid)
+        if args.hybrid:
+            return elgamal.elgamal_hybrid_encrypt_file(args.input, args.output, key['p'], key['g'], key['y'])
+        size_out = (key['p'].bit_length() + 7) // 8
+        return elgamal.elgamal_encrypt_file(args.input, args.output, key['p'], key['g'], key['y'], size_out)
+    vernam = load_algorithm('vernam')
+    key = _vernam_key(args.key)['key']
+    size = (key.bit_length() + 7) // 8
+    return _encrypt_with_size(
+        lambda src, dst: vernam.vernam_process_file(src, dst, key, size, size),
+        args.input, args.output)
+
+
+
+def cmd_decrypt(args):
+    if args.algorithm == 'rsa':
+        rsa = load_algorithm('rsa')
+        key = _rsa_key(args.key, args.bits, args.primes)
+        size_out = (key.n.bit_length() + 7) // 8
+        return _decrypt_with_size(
+            lambda src, dst, size: rsa.rsa_process_file(src, dst, key.n, key, size_out, size_out - 1, size),
+            args.input, args.output)
+    if args.algorithm == 'elgamal':
+        elgamal = load_algorithm('elgamal')
+        key = _elgamal_key(args.key, args.hybrid)
+        if args.hybrid:
+            return elgamal.elgamal_hybrid_decrypt_file(args.input, args.output, key['p'], key['x'])
+        size_in = (key['p'].bit_length() + 7) // 8
+        return elgamal.elgamal_decrypt_file(args.input, args.output, key['p'], key['x'], size_in)
+    vernam = load_algorithm('vernam')
+    key = _vernam_key(args.key)['key']
+    size = (key.bit_length() + 7) // 8
+    return _decrypt_with_size(
+        lambda src, dst, original_size: vernam.vernam_process_file(src, dst, key, size, size, original_size),
+        args.input, args.output)
+
+
+
+def cmd_sign(args):
+    sign_path = args.signature or args.input + ".sig"
+    if args.algorithm == 'rsa':
+        rsa_sign_big = load_algorithm('rsa_sign_big')
+        key = _rsa_key(args.key, args.bits, args.primes)
+        return rsa_sign_big.rsa_sign(args.input, sign_path, key.n, key, key.e)
+    if args.algorithm == 'elgamal':
+        elgamal_sign = load_algorithm('elgamal_sign')
+        key = _elgamal_key(args.key)
+        return elgamal_sign.elgamal_sign(args.input, sign_path, key['p'], key['g'], key['x'], key['y'])
+    module = load_algorithm(args.algorithm)
+    key = _dsa_key(args.key, args.algorithm)
+    sign = getattr(module, f'{args.algorithm}_sign')
+    return sign(args.input, sign_path, key['q'], key['p'], key['a'], key['public_key'], key['private_key'])
+
+
+
+def cmd_verify(args):
+    sign_path = args.signature or args.input + ".sig"
+    module_name, function = {
+        'rsa': ('rsa_sign_big', 'rsa_check_sign'),
+        'elgamal': ('elgamal_sign', 'elgamal_check_sign'),
+        'gost': ('gost', 'gost_check_sign'),
+        'fips': ('fips', 'fips_check_sign'),
+    }[args.algorithm]
+    return getattr(load_algorithm(module_name), function)(args.input, sign_path)
+
+
+
+def cmd_dlog(args):
+    bsgs = load_algorithm('bsgs')
+    x = bsgs.baby_step_giant_step(args.a, args.y, args.p)
+    if x is None:
+        print("Решение не найдено.", file=sys.stderr)
+        return False
+    print(x)
+    return True
+
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Криптографическая библиотека. Без команды запускается интерактивное меню.")
+    sub = parser.add_subparsers(dest='command')
+
+    for name, help_text, algorithms in (('encrypt', "зашифровать файл", CIPHERS),
+                                        ('decrypt', "расшифровать файл", CIPHERS)):
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument('algorithm', choices=algorithms)
+        cmd.add_argument('input', help="входной файл")
+        cmd.add_argument('output', help="выходной файл")
+        cmd.add_argument('--key', required=True, help="файл ключа JSON (создается, если его нет)")
+        cmd.add_argument('--bits', type=int, default=2048, help="размер модуля нового ключа RSA")
+        cmd.add_argument('--primes', type=int, default=2, choices=(2, 3, 4),
+                         help="число простых в модуле нового ключа RSA")
+        cmd.add_argument('--hybrid', action='store_true',
+                         help="Эль-Гамаль: гибридный режим (ключ сеанса + поточное шифрование с MAC); "
+                              "новый ключ создается с p из 2048 бит, ключ с коротким p отклоняется")
+
+    sign = sub.add_parser('sign', help="подписать файл")
+    sign.add_argument('algorithm', choices=SIGNATURES)
+    sign.add_argument('input', help="подписываемый файл")
+    sign.add_argument('--signature', help="файл подписи (по умолчанию <input>.sig)")
+    sign.add_argument('--key', required=True, help="файл ключа JSON (создается, если его нет)")
+    sign.add_argument('--bits', type=int, default=2048, help="размер модуля нового ключа RSA")
+    sign.add_argument('--primes', type=int, default=2, choices=(2, 3, 4),
+                      help="число простых в модуле нового ключа RSA")
+
+    verify = sub.add_parser('verify', help="проверить подпись (открытый ключ берется из файла подписи)")
+    verify.add_argument('algorithm', choices=SIGNATURES)
+    verify.add_argument('input', help="подписанный файл")
+    verify.add_argument('--signature', help="файл подписи (по умолчанию <input>.sig)")
+
+    dlog = sub.add_parser('dlog', help="дискретный логарифм: найти x, y = a^x mod p")
+    dlog.add_argument('a', type=int)
+    dlog.add_argument('y', type=int)
+    dlog.add_argument('p', type=int)
+
+    return parser
+
+
+
+COMMANDS = {
+    'encrypt': cmd_encrypt,
+    'decrypt': cmd_decrypt,
+    'sign': cmd_sign,
+    'verify': cmd_verify,
+    'dlog': cmd_dlog,
+}
+
+
+
+def run_command(argv):
+    """
+    Выполняет команду без диалога, например:
+        python main.py encrypt rsa in.bin out.bin --key rsa.json
+        python main.py verify gost in.bin
+        python main.py dlog 2 9 11
+
+    Returns:
+        int: Код возврата (0 - успех).
+    """
+    args = build_parser().parse_args(argv)
+    if args.command is None:
+        menu()
+        return 0
+    try:
+        return 0 if COMMANDS[args.command](args) else 1
+    except (OSError, ValueError) as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+
+
+
+def menu():
     """Главное меню программы."""
     while True:
         print("\n" + "#" * 50)
         print("Криптографическая библиотека: Главное меню")
         print("#" * 50)
-        print("1 - Дискретный логарифм ('Шаг младенца, шаг великана')")
-        print("2 - Обмен ключами Диффи-Хеллмана")
-        print("3 - Шифр Шамира")
-        print("4 - Шифр Эль-Гамаля")
-        print("5 - Шифр RSA")
-        print("6 - Шифр Вернама")
-        print("7 - Подпись/Проверка RSA")
-        print("8 - Подпись Эль-Гамаля")
-        print("9 - Подпись ГОСТ Р 34.10-94")
-        print("10 - Подпись FIPS 186")
+        for key, (title, _, _) in ALGORITHMS.items():
+            print(f"{key} - {title}")
         print("0 - Выход")
 
         choice = input("Ваш выбор: ")
@@ -38,30 +310,30 @@ def main():
         if choice == '0':
             print("Выход из программы.")
             break
-        elif choice == '1':
-            bsgs.demo_bsgs()
-        elif choice == '2':
-            diffie_hellman.demo_diffie_hellman()
-        elif choice == '3':
-            shamir.demo_shamir()
-        elif choice == '4':
-            elgamal.demo_elgamal()
-        elif choice == '5':
-            rsa.demo_rsa()
-        elif choice == '6':
-            vernam.demo_vernam()
-        elif choice == '7':
-            # rsa_sign.demo_rsa_sign()
-            rsa_sign_big.demo_rsa_sign()
-        elif choice == '8':
-            elgamal_sign.demo_elgamal_sign()
-        elif choice == '9':
-            gost.demo_gost_sign()
-        elif choice == '10':
-            fips.demo_fips_sign()
+        elif choice in ALGORITHMS:
+            _, module_name, demo = ALGORITHMS[choice]
+            getattr(load_algorithm(module_name), demo)()
         else:
             print("Неверный выбор!")
 
 
+
+def main(argv=None):
+    # Сбор статистики вызовов включается без изменения кода (см. instrumentation):
+    # DINF_INSTRUMENT=1 - отчет печатается после выполнения команды,
+    # DINF_INSTRUMENT=<путь>.json - статистика записывается в файл
+    report = os.environ.get('DINF_INSTRUMENT')
+    if not report:
+        return run_command(sys.argv[1:] if argv is None else argv)
+    instrumentation = load_algorithm('instrumentation')
+    with instrumentation.instrumented():
+        code = run_command(sys.argv[1:] if argv is None else argv)
+    if report.endswith('.json'):
+        instrumentation.export_json(report)
+    else:
+        instrumentation.print_report()
+    return code
+
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+
+import crypt_lib as cl
+
+# Версия формата хранилища: записи другой версии игнорируются и генерируются заново
+STORE_VERSION = 1
+
+# Каталог хранилища можно переопределить переменной окружения
+STORE_DIR_ENV = 'DINF_PARAM_STORE'
+DEFAULT_STORE_DIR = os.path.join(os.path.expanduser('~'), '.dinf_params')
+
+# Размер длиннее этого (диапазон из больших чисел) заменяется в имени файла
+# его SHA-256: иначе имя не помещается в ограничение файловой системы
+STORE_NAME_MAX = 64
+
+
+
+def store_dir():
+    """Каталог, в котором хранятся параметры групп."""
+    return os.environ.get(STORE_DIR_ENV, DEFAULT_STORE_DIR)
+
+
+
+def _store_path(algorithm, size, suffix='.json'):
+    name = str(size)
+    if len(name) > STORE_NAME_MAX:
+        name = hashlib.sha256(name.encode('utf-8')).hexdigest()
+    return os.path.join(store_dir(), f"{algorithm}_{name}{suffix}")
+
+
+
+def _checksum(algorithm, size, params):
+    """SHA-256 от канонического представления записи."""
+    payload = json.dumps({'version': STORE_VERSION, 'algorithm': algorithm,
+                          'size': str(size), 'params': params}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+
+def save_params(algorithm, size, params):
+    """
+    Сохраняет проверенные параметры группы.
+
+    Запись выполняется во временный файл с последующей атомарной заменой,
+    поэтому параллельно работающие процессы не увидят половину файла.
+
+    Args:
+        algorithm (str): Имя алгоритма ('dh', 'elgamal', 'gost', 'fips').
+        size: Размер параметров (битность или диапазон).
+        params (dict): Параметры группы (имя -> int).
+    """
+    encoded = {name: format(value, 'x') for name, value in params.items()}
+    record = {
+        'version': STORE_VERSION,
+        'algorithm': algorithm,
+        'size': str(size),
+        'params': encoded,
+        'checksum': _checksum(algorithm, size, encoded),
+    }
+    os.makedirs(store_dir(), exist_ok=True)
+    path = _store_path(algorithm, size)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+
+def load_params(algorithm, size, validate=None):
+    """
+    Загружает параметры группы из хранилища.
+
+    Проверка дешевая: версия формата, контрольная сумма и соотношения
+    между параметрами (validate), без повторной проверки простоты -
+    она выполнялась при генерации, перед сохранением.
+
+    Args:
+        algorithm (str): Имя алгоритма.
+        size: Размер параметров.
+        validate (callable): Проверка validate(params) -> bool.
+
+    Returns:
+        dict or None: Параметры группы или None, если записи нет или она повреждена.
+    """
+    try:
+        with open(_store_path(algorithm, size), 'r', encoding='utf-8') as f:
+            record = json.load(f)
+        if record.get('version') != STORE_VERSION:
+            return None
+        encoded = record['params']
+        if record.get('checksum') != _checksum(algorithm, size, encoded):
+            return None
+        params = {name: int(value, 16) for name, value in encoded.items()}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+    if validate is not None and not validate(params):
+        return None
+    return params
+
+
+
+def get_or_generate(algorithm, size, generate, validate=None):
+    """
+    Возвращает параметры группы из хранилища, а если их нет (или запись
+    не прошла проверку) - генерирует, сохраняет и возвращает.
+
+    Args:
+        algorithm (str): Имя алгоритма.
+        size: Размер параметров.
+        generate (callable): Генерация параметров, возвращает dict.
+        validate (callable): Проверка validate(params) -> bool.
+
+    Returns:
+        dict: Параметры группы.
+    """
+    params = load_params(algorithm, size, validate)
+    if params is None:
+        params = generate()
+        try:
+            save_params(algorithm, size, params)
+        except OSError as e:
+            print(f"Предупреждение: не удалось сохранить параметры {algorithm} ({size}): {e}")
+    return params
+
+
+
+def safe_prime_group_validator(min_p, max_p):
+    """
+    Проверка группы (p, q, g) по безопасному простому p = 2q + 1:
+    g - первообразный корень (его порядок не 1, не 2 и не q).
+    """
+    def validate(params):
+        p, q, g = params['p'], params['q'], params['g']
+        return (min_p <= p <= max_p and p == 2 * q + 1 and 1 < g < p - 1
+                and pow(g, q, p) != 1)
+    return validate
+
+
+
+def structured_group_validator(min_p, max_p):
+    """
+    Проверка группы (p, q, g) по структурированному простому p = b*q + 1
+    (cl.generate_structured_prime): q | p - 1 и порядок g делится на q.
+    """
+    def validate(params):
+        p, q, g = params['p'], params['q'], params['g']
+        return (min_p <= p <= max_p and (p - 1) % q == 0 and 1 < g < p - 1
+                and pow(g, (p - 1) // q, p) != 1)
+    return validate
+
+
+
+def dsa_group_validator(q_bits, p_bits):
+    """
+    Проверка группы (q, p, a) для ГОСТ Р 34.10-94 / FIPS 186:
+    битности q и p, q | p - 1 и a порядка q.
+    """
+    def validate(params):
+        q, p, a = params['q'], params['p'], params['a']
+        return (q.bit_length() == q_bits and p.bit_length() == p_bits
+                and (p - 1) % q == 0 and 1 < a < p and pow(a, q, p) == 1)
+    return validate
+
+
+
+def load_fixed_base_table(algorithm, size, base, modulus, max_bits):
+    """
+    Загружает таблицу фиксированного основания, сохраненную рядом с
+    параметрами группы, или строит и сохраняет ее. Таблица регистрируется
+    в кэше crypt_lib, так что cl.fixed_base_pow сразу начинает ее использовать.
+
+    Returns:
+        FixedBaseTable: Таблица для base по модулю modulus.
+    """
+    path = _store_path(algorithm, size, '.fbt')
+    table = None
+    try:
+        table = cl.FixedBaseTable.load(path)
+        if table.base != base % modulus or table.modulus != modulus or table.max_bits < max_bits:
+            table = None
+    except (OSError, ValueError):
+        table = None
+    if table is None:
+        table = cl.FixedBaseTable(base, modulus, max_bits)
+        try:
+            os.makedirs(store_dir(), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            table.save(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Предупреждение: не удалось сохранить таблицу {path}: {e}")
+    cl.register_fixed_base_table(table)
+    return table
@@ -0,0 +1,340 @@
+import functools
+import math
+import random
+
+# Граница таблицы малых простых для пробного деления
+SMALL_PRIME_LIMIT = 1000
+
+# Основания, при которых тест Миллера-Рабина детерминирован для n < 3.3 * 10^24
+# (в частности, для всех n < 2^64)
+DETERMINISTIC_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+
+
+@functools.lru_cache(maxsize=None)
+def small_primes(limit):
+    """
+    Решето Эратосфена.
+
+    Args:
+        limit (int): Верхняя граница (не включительно).
+
+    Returns:
+        tuple: Все простые числа, меньшие limit.
+    """
+
+    if limit < 3:
+        return ()
+    sieve = bytearray([1]) * limit
+    sieve[0] = sieve[1] = 0
+    for i in range(2, math.isqrt(limit - 1) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, limit, i)))
+    return tuple(i for i in range(limit) if sieve[i])
+
+
+SMALL_PRIMES = small_primes(SMALL_PRIME_LIMIT)
+_SMALL_PRIME_SET = frozenset(SMALL_PRIMES)
+# Произведение всех малых простых: один вызов gcd заменяет 168 делений
+_SMALL_PRIMES_PRODUCT = math.prod(SMALL_PRIMES)
+
+
+
+def sieve_params(bits):
+    """
+    Параметры решета для поиска простых заданной битности.
+
+    Returns:
+        tuple: (граница малых простых для просеивания, число нечетных
+               кандидатов в одном окне). Окно примерно в 8 раз больше
+               среднего расстояния между простыми такой битности.
+    """
+
+    if bits <= 64:
+        limit = 1 << 10
+    elif bits <= 256:
+        limit = 1 << 12
+    elif bits <= 768:
+        limit = 1 << 14
+    else:
+        limit = 1 << 15
+    return limit, max(64, 3 * bits)
+
+
+
+def sieve_window(start, count, primes, safe=False):
+    """
+    Просеивает окно нечетных кандидатов start, start + 2, ..., start + 2*(count-1).
+
+    Для каждого малого простого r вычеркиваются все кратные r (кроме самого r),
+    одно присваивание среза на каждое r. В режиме safe кандидат q вычеркивается
+    также, если на r делится 2q + 1, - так просеиваются кандидаты в простые
+    Софи Жермен, у которых оба числа q и 2q + 1 должны быть простыми.
+
+    Args:
+        start (int): Нечетное начало окна.
+        count (int): Количество кандидатов в окне.
+        primes (tuple): Малые простые для просеивания (2 пропускается).
+        safe (bool): Просеивать одновременно q и 2q + 1.
+
+    Returns:
+        bytearray: flags[i] == 1, если start + 2*i (и 2*(start + 2*i) + 1 в режиме
+                   safe) не делится ни на одно из primes.
+    """
+
+    flags = bytearray([1]) * count
+    for r in primes:
+        if r == 2:
+            continue
+        inv2 = (r + 1) >> 1
+        # start + 2*i ≡ 0 (mod r)  =>  i ≡ -start * 2^(-1) (mod r)
+        i = (-start * inv2) % r
+        if start + 2 * i == r:
+            i += r
+        if i < count:
+            flags[i::r] = bytes((count - 1 - i) // r + 1)
+        if safe:
+            # 2*(start + 2*i) + 1 ≡ 0 (mod r)  =>  i ≡ -(2*start + 1) * 4^(-1) (mod r)
+            i = (-(2 * start + 1) * inv2 * inv2) % r
+            if 2 * (start + 2 * i) + 1 == r:
+                i += r
+            if i < count:
+                flags[i::r] = bytes((count - 1 - i) // r + 1)
+    return flags
+
+
+
+def miller_rabin_rounds(bits):
+    """
+    Количество раундов Миллера-Рабина для случайного кандидата заданной
+    битности, при котором вероятность ошибки не превышает 2^-80
+    (HAC, таблица 4.4).
+    """
+
+    for min_bits, rounds in ((1300, 2), (850, 3), (650, 4), (550, 5), (450, 6),
+                             (400, 7), (350, 8), (300, 9), (250, 12), (200, 15),
+                             (150, 18), (100, 27)):
+        if bits >= min_bits:
+            return rounds
+    return 40
+
+
+
+def miller_rabin_test(n, bases):
+    """
+    Тест Миллера-Рабина для нечетного n > 3 по заданным основаниям.
+
+    Args:
+        n (int): Нечетное число для проверки.
+        bases (iterable): Основания a (берутся по модулю n).
+
+    Returns:
+        bool: False если n составное, True если n сильно вероятно простое
+              по всем основаниям.
+    """
+
+    d = n - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    for a in bases:
+        a %= n
+        if a in (0, 1, n - 1):
+            continue
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = (x * x) % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+
+def _jacobi(a, n):
+    """Символ Якоби (a/n) для нечетного n > 0."""
+    a %= n
+    result = 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+
+def strong_lucas_test(n):
+    """
+    Сильный тест Люка с параметрами Селфриджа (метод A): D - первое из
+    5, -7, 9, -11, ... с символом Якоби (D/n) = -1, P = 1, Q = (1 - D) / 4.
+
+    Args:
+        n (int): Нечетное число > 3, не делящееся на малые простые.
+
+    Returns:
+        bool: False если n составное, True если n сильное вероятно простое Люка.
+    """
+
+    if math.isqrt(n) ** 2 == n:
+        return False
+    D = 5
+    while True:
+        j = _jacobi(D, n)
+        if j == -1:
+            break
+        if j == 0 and abs(D) != n:
+            return False
+        D = -D - 2 if D > 0 else -D + 2
+    P = 1
+    Q = (1 - D) // 4
+
+    d = n + 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+
+    U, V, Qk = 1, P, Q % n
+    for bit in bin(d)[3:]:
+        U = (U * V) % n
+        V = (V * V - 2 * Qk) % n
+        Qk = (Qk * Qk) % n
+        if bit == '1':
+            U, V = P * U + V, D * U + P * V
+            if U & 1:
+                U += n
+            U = (U >> 1) % n
+            if V & 1:
+                V += n
+            V = (V >> 1) % n
+            Qk = (Qk * Q) % n
+
+    if U == 0 or V == 0:
+        return True
+    for _ in range(s - 1):
+        V = (V * V - 2 * Qk) % n
+        if V == 0:
+            return True
+        Qk = (Qk * Qk) % n
+    return False
+
+
+
+def is_probable_prime(n, rounds=None, bpsw=False):
+    """
+    Проверка простоты: пробное деление на малые простые, затем
+    тест Миллера-Рабина.
+
+    Числа меньше 2^64 проверяются детерминированно. Для больших чисел
+    число раундов выбирается по битности (miller_rabin_rounds), либо
+    используется тест Бейли-PSW (Миллер-Рабин по основанию 2 и сильный
+    тест Люка), для которого не известно ни одного контрпримера.
+
+    Args:
+        n (int): Число для проверки на простоту.
+        rounds (int): Количество раундов Миллера-Рабина (по умолчанию по битности n).
+        bpsw (bool): Использовать тест Бейли-PSW вместо случайных оснований.
+
+    Returns:
+        bool: True если число (вероятно) простое, False если составное.
+    """
+
+    if n < 2:
+        return False
+    if n < SMALL_PRIME_LIMIT:
+        return n in _SMALL_PRIME_SET
+    if math.gcd(n, _SMALL_PRIMES_PRODUCT) != 1:
+        return False
+    if n < SMALL_PRIME_LIMIT * SMALL_PRIME_LIMIT:
+        return True
+    if n < 2**64:
+        return miller_rabin_test(n, DETERMINISTIC_BASES)
+    if bpsw:
+        return miller_rabin_test(n, (2,)) and strong_lucas_test(n)
+    if rounds is None:
+        rounds = miller_rabin_rounds(n.bit_length())
+    return miller_rabin_test(n, (random.randint(2, n - 2) for _ in range(rounds)))
+
+
+
+def pollard_rho(n, rng=random):
+    """
+    Поиск нетривиального делителя составного n методом Полларда (вариант Брента:
+    произведение разностей накапливается, gcd вычисляется раз в 128 шагов).
+
+    Args:
+        n (int): Составное число.
+        rng: Источник случайности (модуль random или random.Random).
+
+    Returns:
+        int: Делитель d, 1 < d < n.
+    """
+
+    if n % 2 == 0:
+        return 2
+    while True:
+        y, c = rng.randrange(1, n), rng.randrange(1, n)
+        m = 128
+        g = r = q = 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            r <<= 1
+        if g == n:
+            # Произведение обнулилось: повторяем последний отрезок по одному шагу
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+
+
+def factorize(n, rng=random):
+    """
+    Разложение на простые множители: пробное деление на малые простые,
+    затем метод Полларда для оставшейся части.
+
+    Метод Полларда находит делитель d примерно за sqrt(d) шагов, поэтому
+    разложение практически возможно, только если у n не более одного
+    большого простого делителя (p - 1 для "структурированных" простых,
+    числа до ~2^100).
+
+    Args:
+        n (int): Число больше 0.
+        rng: Источник случайности для метода Полларда.
+
+    Returns:
+        dict: {простой делитель: степень}, делители по возрастанию.
+    """
+
+    factors = {}
+    for r in SMALL_PRIMES:
+        if r * r > n:
+            break
+        while n % r == 0:
+            factors[r] = factors.get(r, 0) + 1
+            n //= r
+    stack = [n] if n > 1 else []
+    while stack:
+        m = stack.pop()
+        if is_probable_prime(m, bpsw=True):
+            factors[m] = factors.get(m, 0) + 1
+            continue
+        d = pollard_rho(m, rng)
+        stack.extend((d, m // d))
+    return dict(sorted(factors.items()))
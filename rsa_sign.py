@@ -4,21 +4,12 @@ import os
 
 import rsa
 
-def rsa_sign(input_path, sign_path, n_big, private_key, public_key):
+def _rsa_sign_hash(file_hash, sign_path, n_big, private_key, public_key):
     """
-    Подписывает файл по протоколу RSA.
-    
-    Args:
-        input_path (str): Путь к входному файлу (файл для подписи).
-        output_path (str): Путь к выходному файлу (файл с вычисленной подписью).
-        n_big (int): Большое специально сгенерированное число.
-        private_key (int): Приватный ключ используемый только для подписи.
-        public_key (int): Публичный ключ записывается в файл для дальнейшей проверки подписи
+    Создает подпись по готовому хэшу SHA-256 (file_hash, bytes).
+    Общая часть rsa_sign и rsa_sign_stream.
     """
     try:
-        file_hash = cl.calculate_file_hash(input_path)
-        if file_hash is None: return False
-                
         signed_byte_len = (n_big.bit_length() + 7) // 8
         with open(sign_path, 'wb') as f_sign:
             
@@ -30,15 +21,16 @@ def rsa_sign(input_path, sign_path, n_big, private_key, public_key):
             f_sign.write(len(public_key_bytes).to_bytes(2, 'big'))
             f_sign.write(public_key_bytes)
 
+            sign_value = rsa.rsa_private_op(private_key, n_big)
             for byte_of_hash in file_hash:
                 
-                signed_byte_int = cl.fast_exp_mod(byte_of_hash, private_key, n_big)
+                signed_byte_int = sign_value(byte_of_hash)
                 f_sign.write(signed_byte_int.to_bytes(signed_byte_len, 'big'))
 
         return True
     
     except FileNotFoundError:
-        print(f"Ошибка: Файл не найден по пути {input_path}")
+        print(f"Ошибка: Файл не найден по пути {sign_path}")
         return False
     except Exception as e:
         print(f"Произошла ошибка при обработке файла: {e}")
@@ -46,18 +38,45 @@ def rsa_sign(input_path, sign_path, n_big, private_key, public_key):
 
 
 
-def rsa_check_sign(input_path, sign_path):
+def rsa_sign(input_path, sign_path, n_big, private_key, public_key):
     """
-    Проверяет подпись файла по протоколу RSA.
+    Подписывает файл по протоколу RSA.
     
     Args:
         input_path (str): Путь к входному файлу (файл для подписи).
         output_path (str): Путь к выходному файлу (файл с вычисленной подписью).
+        n_big (int): Большое специально сгенерированное число.
+        private_key (int or rsa.RSAPrivateKey): Приватный ключ используемый только для подписи.
+        public_key (int): Публичный ключ записывается в файл для дальнейшей проверки подписи
+    """
+    file_hash = cl.calculate_file_hash(input_path)
+    if file_hash is None: return False
+    return _rsa_sign_hash(file_hash, sign_path, n_big, private_key, public_key)
+
+
+
+def rsa_sign_stream(source, sign_path, n_big, private_key, public_key):
+    """
+    Подпись данных из потока (см. rsa_sign).
+
+    Args:
+        source: Двоичный файловый объект, bytes/memoryview или итератор блоков bytes.
     """
     try:
-        expected_hash = cl.calculate_file_hash(input_path)
-        if expected_hash is None: return False
+        file_hash = cl.calculate_stream_hash(source)
+    except Exception as e:
+        print(f"Ошибка чтения данных: {e}")
+        return False
+    return _rsa_sign_hash(file_hash, sign_path, n_big, private_key, public_key)
+
 
+
+def _rsa_check_sign_hash(expected_hash, sign_path):
+    """
+    Проверяет подпись по готовому хэшу SHA-256 (expected_hash, bytes).
+    Общая часть rsa_check_sign и rsa_check_sign_stream.
+    """
+    try:
         reconstructed_hash = b''
 
         with open(sign_path, 'rb') as f_sign:
@@ -92,7 +111,7 @@ def rsa_check_sign(input_path, sign_path):
             return False
     
     except FileNotFoundError:
-        print(f"Ошибка: Файл не найден по пути {input_path}")
+        print(f"Ошибка: Файл не найден по пути {sign_path}")
         return False
     except Exception as public_key:
         print(f"Произошла ошибка при обработке файла: {public_key}")
@@ -100,6 +119,36 @@ def rsa_check_sign(input_path, sign_path):
 
 
 
+def rsa_check_sign(input_path, sign_path):
+    """
+    Проверяет подпись файла по протоколу RSA.
+    
+    Args:
+        input_path (str): Путь к входному файлу (файл для подписи).
+        output_path (str): Путь к выходному файлу (файл с вычисленной подписью).
+    """
+    expected_hash = cl.calculate_file_hash(input_path)
+    if expected_hash is None: return False
+    return _rsa_check_sign_hash(expected_hash, sign_path)
+
+
+
+def rsa_check_sign_stream(source, sign_path):
+    """
+    Проверка подписи данных из потока (см. rsa_check_sign).
+
+    Args:
+        source: Двоичный файловый объект, bytes/memoryview или итератор блоков bytes.
+    """
+    try:
+        expected_hash = cl.calculate_stream_hash(source)
+    except Exception as e:
+        print(f"Ошибка чтения данных: {e}")
+        return False
+    return _rsa_check_sign_hash(expected_hash, sign_path)
+
+
+
 def demo_rsa_sign():
     """
     Единый процесс демонстрации подписи и проверки RSA.
@@ -136,14 +185,14 @@ def demo_rsa_sign():
                 if p <= 255:
                     print("Ошибка: p должно быть больше 255.")
                     return
-                if not cl.fermat_primality_test(p):
+                if not cl.is_probable_prime(p, bpsw=True):
                     print(f"Предупреждение: {p} не является вероятно простым числом.")
 
                 q = int(input("Введите простое q: "))
                 if q <= 255:
                     print("Ошибка: q должно быть больше 255.")
                     return
-                if not cl.fermat_primality_test(q):
+                if not cl.is_probable_prime(q, bpsw=True):
                     print(f"Предупреждение: {q} не является вероятно простым числом.")
                 
                 n_big = p * q
@@ -153,7 +202,7 @@ def demo_rsa_sign():
                 if math.gcd(public_key, phi) != 1:
                     print(f"Предупреждение: {public_key} не является взаимно простым с phi.")
 
-                private_key = cl.mod_inverse(public_key, phi)
+                private_key = rsa.RSAPrivateKey(p, q, public_key)
             
             elif param_choice == '2':
                 print("\nГенерация параметров...")
@@ -166,7 +215,7 @@ def demo_rsa_sign():
             print("\n--- Сгенерированные параметры ---")
             print(f"N = {n_big}")
             print(f"Открытый ключ: {public_key}")
-            print(f"Секретный ключ: {private_key}")
+            print(f"Секретный ключ: {private_key.d}")
 
         except Exception as e:
             print(f"Ошибка при обработке параметров: {e}")
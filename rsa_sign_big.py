@@ -4,21 +4,12 @@ import os
 
 import rsa
 
-def rsa_sign(input_path, sign_path, n_big, private_key, public_key):
+def _rsa_sign_hash(file_hash, sign_path, n_big, private_key, public_key):
     """
-    Подписывает файл по протоколу RSA, обрабатывая хэш как единое целое число.
-    
-    Args:
-        input_path (str): Путь к входному файлу (файл для подписи).
-        sign_path (str): Путь к выходному файлу (файл с вычисленной подписью).
-        n_big (int): Большое специально сгенерированное число (модуль N).
-        private_key (int): Приватный ключ (d).
-        public_key (int): Публичный ключ (e).
+    Создает подпись по готовому хэшу SHA-256 (file_hash, bytes).
+    Общая часть rsa_sign и rsa_sign_stream.
     """
     try:
-        file_hash = cl.calculate_file_hash(input_path)
-        if file_hash is None: return False
-
         hash_as_int = int.from_bytes(file_hash, 'big')
 
         if hash_as_int >= n_big:
@@ -37,14 +28,19 @@ def rsa_sign(input_path, sign_path, n_big, private_key, public_key):
             f_sign.write(len(public_key_bytes).to_bytes(2, 'big'))
             f_sign.write(public_key_bytes)
 
-            signed_hash_int = cl.fast_exp_mod(hash_as_int, private_key, n_big)
+            signed_hash_int = rsa.rsa_private_op(private_key, n_big)(hash_as_int)
             
             f_sign.write(signed_hash_int.to_bytes(signed_byte_len, 'big'))
 
+            # Необязательный последний байт - число простых множителей N.
+            # Прежние версии его не читают, поэтому формат остается совместимым
+            if isinstance(private_key, rsa.RSAPrivateKey):
+                f_sign.write(len(private_key.primes).to_bytes(1, 'big'))
+
         return True
     
     except FileNotFoundError:
-        print(f"Ошибка: Файл не найден по пути {input_path}")
+        print(f"Ошибка: Файл не найден по пути {sign_path}")
         return False
     except Exception as e:
         print(f"Произошла ошибка при обработке файла: {e}")
@@ -52,18 +48,48 @@ def rsa_sign(input_path, sign_path, n_big, private_key, public_key):
 
 
 
-def rsa_check_sign(input_path, sign_path):
+def rsa_sign(input_path, sign_path, n_big, private_key, public_key):
     """
-    Проверяет подпись файла по протоколу RSA, работая с хэшем как с единым целым числом.
+    Подписывает файл по протоколу RSA, обрабатывая хэш как единое целое число.
     
     Args:
-        input_path (str): Путь к входному файлу.
-        sign_path (str): Путь к файлу с подписью.
+        input_path (str): Путь к входному файлу (файл для подписи).
+        sign_path (str): Путь к выходному файлу (файл с вычисленной подписью).
+        n_big (int): Большое специально сгенерированное число (модуль N).
+        private_key (int or rsa.RSAPrivateKey): Приватный ключ (d); для
+                                                RSAPrivateKey подпись вычисляется по КТО,
+                                                а в файл подписи записывается число
+                                                простых множителей N.
+        public_key (int): Публичный ключ (e).
+    """
+    file_hash = cl.calculate_file_hash(input_path)
+    if file_hash is None: return False
+    return _rsa_sign_hash(file_hash, sign_path, n_big, private_key, public_key)
+
+
+
+def rsa_sign_stream(source, sign_path, n_big, private_key, public_key):
+    """
+    Подпись данных из потока (см. rsa_sign).
+
+    Args:
+        source: Двоичный файловый объект, bytes/memoryview или итератор блоков bytes.
     """
     try:
-        expected_hash = cl.calculate_file_hash(input_path)
-        if expected_hash is None: return False
+        file_hash = cl.calculate_stream_hash(source)
+    except Exception as e:
+        print(f"Ошибка чтения данных: {e}")
+        return False
+    return _rsa_sign_hash(file_hash, sign_path, n_big, private_key, public_key)
 
+
+
+def _rsa_check_sign_hash(expected_hash, sign_path):
+    """
+    Проверяет подпись по готовому хэшу SHA-256 (expected_hash, bytes).
+    Общая часть rsa_check_sign и rsa_check_sign_stream.
+    """
+    try:
         expected_hash_int = int.from_bytes(expected_hash, 'big')
 
         with open(sign_path, 'rb') as f_sign:
@@ -84,6 +110,10 @@ def rsa_check_sign(input_path, sign_path):
             
             decrypted_hash_int = cl.fast_exp_mod(signed_hash_int, public_key, n)
 
+            structure = f_sign.read(1)
+            if structure:
+                print(f"Модуль N состоит из {structure[0]} простых множителей.")
+
         if decrypted_hash_int == expected_hash_int:
             print("ПОДПИСЬ ВЕРНА")
             return True
@@ -95,13 +125,44 @@ def rsa_check_sign(input_path, sign_path):
             return False
     
     except FileNotFoundError:
-        print(f"Ошибка: Файл не найден по пути {input_path} или {sign_path}")
+        print(f"Ошибка: Файл не найден по пути {sign_path}")
         return False
     except Exception as e:
         print(f"Произошла ошибка при обработке файла: {e}")
         return False
 
 
+
+def rsa_check_sign(input_path, sign_path):
+    """
+    Проверяет подпись файла по протоколу RSA, работая с хэшем как с единым целым числом.
+    
+    Args:
+        input_path (str): Путь к входному файлу.
+        sign_path (str): Путь к файлу с подписью.
+    """
+    expected_hash = cl.calculate_file_hash(input_path)
+    if expected_hash is None: return False
+    return _rsa_check_sign_hash(expected_hash, sign_path)
+
+
+
+def rsa_check_sign_stream(source, sign_path):
+    """
+    Проверка подписи данных из потока (см. rsa_check_sign).
+
+    Args:
+        source: Двоичный файловый объект, bytes/memoryview или итератор блоков bytes.
+    """
+    try:
+        expected_hash = cl.calculate_stream_hash(source)
+    except Exception as e:
+        print(f"Ошибка чтения данных: {e}")
+        return False
+    return _rsa_check_sign_hash(expected_hash, sign_path)
+
+
+
 def demo_rsa_sign():
     """
     Единый процесс демонстрации подписи и проверки RSA.
@@ -136,11 +197,11 @@ def demo_rsa_sign():
         try:
             if param_choice == '1':
                 p = int(input("Введите простое p (рекомендуется > 2^128): "))
-                if not cl.fermat_primality_test(p):
+                if not cl.is_probable_prime(p, bpsw=True):
                     print(f"Предупреждение: {p} не является вероятно простым числом.")
 
                 q = int(input("Введите простое q (рекомендуется > 2^128): "))
-                if not cl.fermat_primality_test(q):
+                if not cl.is_probable_prime(q, bpsw=True):
                     print(f"Предупреждение: {q} не является вероятно простым числом.")
                 
                 n_big = p * q
@@ -150,11 +211,16 @@ def demo_rsa_sign():
                 if math.gcd(public_key, phi) != 1:
                     print(f"Предупреждение: {public_key} не является взаимно простым с phi.")
 
-                private_key = cl.mod_inverse(public_key, phi)
+                private_key = rsa.RSAPrivateKey(p, q, public_key)
             
             elif param_choice == '2':
+                primes = int(input("Количество простых множителей N (2-4, по умолчанию 2): ") or 2)
+                if not 2 <= primes <= 4:
+                    print("Ошибка: количество простых должно быть от 2 до 4.")
+                    return
                 print("\nГенерация параметров (может занять время)...")
-                n_big, public_key, private_key = rsa.rsa_generate_params(min_p=2**128, max_p=2**129)
+                private_key = rsa.rsa_generate_key(min_p=2**128, max_p=2**129, primes=primes)
+                n_big, public_key = private_key.n, private_key.e
             
             else:
                 print("Неверный выбор!")
@@ -163,7 +229,7 @@ def demo_rsa_sign():
             print("\n--- Сгенерированные параметры ---")
             print(f"N = {n_big}")
             print(f"Открытый ключ: {public_key}")
-            print(f"Секретный ключ: {private_key}")
+            print(f"Секретный ключ: {private_key.d}")
 
         except Exception as e:
             print(f"Ошибка при обработке параметров: {e}")
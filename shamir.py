@@ -1,7 +1,12 @@
 import crypt_lib as cl
+import collections
 import math
 import os
+import queue
 import random
+import threading
+
+import block_codec
 
 def shamir_generate_keys(p):
     """
@@ -22,12 +27,7 @@ def shamir_generate_params(min_p=257, max_p=65535):
     p, C_a, D_a, C_b, D_b.
     """
 
-    p = 0
-    while True:
-        candidate = random.randint(min_p, max_p)
-        if cl.fermat_primality_test(candidate):
-            p = candidate
-            break
+    p = cl.generate_prime_range(min_p, max_p)
             
     c_a, d_a = shamir_generate_keys(p)
     
@@ -35,6 +35,62 @@ def shamir_generate_params(min_p=257, max_p=65535):
     
     return p, c_a, d_a, c_b, d_b
 
+# Заголовок блочного режима: длина исходных данных (8 байт, big-endian)
+LENGTH_HEADER_SIZE = 8
+
+
+
+def shamir_block_sizes(p):
+    """
+    Размеры блоков блочного режима для модуля p.
+
+    Блок открытого текста - наибольшее число байт k, при котором любое
+    k-байтовое значение меньше p; блок шифротекста вмещает любое значение
+    по модулю p. Для p из (256^k, 256^(k+1)) получается k -> k + 1 байт,
+    поэтому с ростом p расширение шифротекста приближается к 1.
+
+    Returns:
+        tuple: (размер блока открытого текста, размер блока шифротекста) в байтах.
+
+    Raises:
+        ValueError: Если p <= 256 (в блок не помещается даже один байт).
+    """
+    if p <= 256:
+        raise ValueError("p должно быть больше 256")
+    return (p.bit_length() - 1) // 8, (p.bit_length() + 7) // 8
+
+
+
+def _transform_chunks(chunks, p, key, block_size_in, block_size_out):
+    """
+    Возводит каждый блок порций chunks в степень key по модулю p.
+
+    Порции должны быть кратны block_size_in; неполный блок допускается
+    только в конце последней порции. Для p <= cl.TABLE_MODE_MAX_MODULUS
+    и блоков по 1-2 байта степени берутся из таблицы (cl.pow_table).
+
+    Yields:
+        bytes: Обработанная порция (блоки по block_size_out байт).
+    """
+    if cl.table_mode_supported(p, block_size_in, block_size_out):
+        # Малый модуль: все значения val^key mod p берутся из таблицы
+        table = cl.pow_table(p, key, max(p, 256**block_size_in))
+        for chunk in chunks:
+            whole = len(chunk) - len(chunk) % block_size_in
+            out = cl.table_map_blocks(table, chunk[:whole], block_size_in, block_size_out)
+            if whole < len(chunk):
+                val = int.from_bytes(chunk[whole:], byteorder='big')
+                out += table[val].to_bytes(block_size_out, byteorder='big')
+            yield out
+        return
+
+    ctx = cl.ModContext(p, key)
+    for chunk in chunks:
+        values = block_codec.decode_ints(chunk, block_size_in)
+        yield block_codec.encode_blocks(ctx.pow_many(values), block_size_out)
+
+
+
 def shamir_process_file(input_path, output_path, p, key, block_size_in, block_size_out):
     """
     Обрабатывает файл (шифрует/расшифровывает) по протоколу Шамира.
@@ -46,19 +102,281 @@ def shamir_process_file(input_path, output_path, p, key, block_size_in, block_si
         key (int): Ключ (C или D) для операции.
         block_size_in (int): Размер блока для чтения (в байтах, 1 для исходного файла).
         block_size_out (int): Размер блока для записи (в байтах, 2 или 4).
+
+    Для p <= cl.TABLE_MODE_MAX_MODULUS и блоков по 1-2 байта файл
+    обрабатывается порциями по таблице степеней (cl.pow_table).
+    """
+    try:
+        with open(input_path, 'rb') as f_in, open(output_path, 'wb') as f_out:
+            for out in _transform_chunks(block_codec.read_chunks(f_in, block_size_in), p, key,
+                                         block_size_in, block_size_out):
+                f_out.write(out)
+        return True
+    except FileNotFoundError:
+        print(f"Ошибка: Файл не найден по пути {input_path}")
+        return False
+    except Exception as e:
+        print(f"Произошла ошибка при обработке файла: {e}")
+        return False
+
+
+
+def _packed_chunks(chunks, size, block_size):
+    """
+    Порции блочного режима: заголовок с длиной size, данные из chunks и
+    дополнение нулями до целого числа блоков block_size.
+
+    Raises:
+        ValueError: Если длина данных не равна size.
+    """
+    buffer = bytearray(size.to_bytes(LENGTH_HEADER_SIZE, byteorder='big'))
+    total = 0
+    for chunk in chunks:
+        total += len(chunk)
+        buffer += chunk
+        whole = len(buffer) - len(buffer) % block_size
+        if whole:
+            yield bytes(buffer[:whole])
+            del buffer[:whole]
+    if total != size:
+        raise ValueError(f"длина данных {total} не совпадает с заголовком {size}")
+    buffer += bytes(-len(buffer) % block_size)
+    if buffer:
+        yield bytes(buffer)
+
+
+
+def _unpacked_chunks(chunks):
+    """
+    Обратная операция к _packed_chunks: отбрасывает заголовок и дополнение.
+
+    Raises:
+        ValueError: Если данных меньше, чем указано в заголовке.
+    """
+    header = b''
+    remaining = None
+    for chunk in chunks:
+        if remaining is None:
+            header += chunk
+            if len(header) < LENGTH_HEADER_SIZE:
+                continue
+            remaining = int.from_bytes(header[:LENGTH_HEADER_SIZE], byteorder='big')
+            chunk = header[LENGTH_HEADER_SIZE:]
+        if remaining:
+            yield chunk[:remaining]
+            remaining -= min(remaining, len(chunk))
+    if remaining is None or remaining:
+        raise ValueError("данные повреждены: файл короче длины в заголовке")
+
+
+
+def shamir_pack_file(input_path, output_path, p, key):
+    """
+    Первый проход блочного режима: файл упаковывается в блоки по k байт
+    (k из shamir_block_sizes), перед данными записывается их длина
+    (LENGTH_HEADER_SIZE байт), последний блок дополняется нулями. Каждый
+    блок шифруется одним возведением в степень key по модулю p.
+
+    Промежуточные проходы выполняются shamir_process_file с блоками
+    шифротекста на входе и выходе, последний - shamir_unpack_file.
+
+    Args:
+        input_path (str): Путь к исходному файлу.
+        output_path (str): Путь к выходному файлу.
+        p (int): Простое число (модуль), p > 256.
+        key (int): Ключ (C) для операции.
     """
     try:
+        block_size_in, block_size_out = shamir_block_sizes(p)
         with open(input_path, 'rb') as f_in, open(output_path, 'wb') as f_out:
-            while True:
-                block = f_in.read(block_size_in)
-                if not block:
-                    break
-                
-                val = int.from_bytes(block, byteorder='big')
-                
-                processed_val = cl.fast_exp_mod(val, key, p)
-                
-                f_out.write(processed_val.to_bytes(block_size_out, byteorder='big'))
+            size = os.fstat(f_in.fileno()).st_size
+            chunks = _packed_chunks(block_codec.read_chunks(f_in, block_size_in), size, block_size_in)
+            for out in _transform_chunks(chunks, p, key, block_size_in, block_size_out):
+                f_out.write(out)
+        return True
+    except FileNotFoundError:
+        print(f"Ошибка: Файл не найден по пути {input_path}")
+        return False
+    except Exception as e:
+        print(f"Произошла ошибка при обработке файла: {e}")
+        return False
+
+
+
+def shamir_unpack_file(input_path, output_path, p, key):
+    """
+    Последний проход блочного режима: блоки шифротекста расшифровываются
+    ключом key, заголовок с длиной и дополнение отбрасываются.
+
+    Args:
+        input_path (str): Путь к входному файлу.
+        output_path (str): Путь к расшифрованному файлу.
+        p (int): Простое число (модуль), p > 256.
+        key (int): Ключ (D) для операции.
+    """
+    try:
+        block_size_out, block_size_in = shamir_block_sizes(p)
+        with open(input_path, 'rb') as f_in, open(output_path, 'wb') as f_out:
+            chunks = _transform_chunks(block_codec.read_chunks(f_in, block_size_in), p, key,
+                                       block_size_in, block_size_out)
+            for out in _unpacked_chunks(chunks):
+                f_out.write(out)
+        return True
+    except FileNotFoundError:
+        print(f"Ошибка: Файл не найден по пути {input_path}")
+        return False
+    except Exception as e:
+        print(f"Произошла ошибка при обработке файла: {e}")
+        return False
+
+
+
+# Максимальное число порций в очереди между стадиями конвейера
+PIPELINE_QUEUE_SIZE = 4
+
+# Признак конца потока в очереди между стадиями
+_END = object()
+
+
+
+class _StageError:
+    """Исключение стадии конвейера, передаваемое через очередь следующей стадии."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+
+def _put(q, item, stop):
+    """Кладет item в ограниченную очередь, пока не выставлен stop. False - если выставлен."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+
+def _in_worker(chunks, queue_size):
+    """
+    Выполняет генератор chunks в отдельном потоке. Готовые порции передаются
+    через очередь не больше queue_size элементов, поэтому стадия не уходит
+    вперед следующей больше чем на queue_size порций.
+    """
+    q = queue.Queue(queue_size)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for chunk in chunks:
+                if not _put(q, chunk, stop):
+                    return
+            item = _END
+        except Exception as e:
+            item = _StageError(e)
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+        _put(q, item, stop)
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item = q.get()
+            if item is _END:
+                return
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+
+
+
+def _cycle_chunk(chunk, p, passes):
+    """Все проходы passes ((ключ, блок на входе, блок на выходе), ...) над одной порцией."""
+    for key, size_in, size_out in passes:
+        chunk, = _transform_chunks((chunk,), p, key, size_in, size_out)
+    return chunk
+
+
+
+def _in_processes(chunks, p, passes, workers, queue_size):
+    """
+    Обрабатывает порции chunks функцией _cycle_chunk в пуле из workers
+    процессов. В работе находится не больше workers + queue_size порций,
+    результаты выдаются в исходном порядке.
+    """
+    # Импортируются здесь: нужны только в режиме с процессами (как в cl.parallel_search)
+    import concurrent.futures
+    import multiprocessing
+
+    with concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context()) as pool:
+        pending = collections.deque()
+        try:
+            for chunk in chunks:
+                pending.append(pool.submit(_cycle_chunk, chunk, p, passes))
+                if len(pending) >= workers + queue_size:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+
+def shamir_pipeline(chunks, size, p, c_a, d_a, c_b, d_b, workers=0, queue_size=PIPELINE_QUEUE_SIZE):
+    """
+    Полный цикл протокола Шамира в памяти: упаковка в блоки, четыре прохода
+    (C_a, C_b, D_a, D_b) и распаковка соединены в цепочку генераторов,
+    промежуточные данные не записываются на диск.
+
+    При workers > 0 порции распределяются между workers процессами: каждый
+    процесс выполняет над своей порцией все четыре прохода. Отдельный поток
+    нужен только для ввода-вывода - он читает и упаковывает исходные данные
+    (не больше queue_size порций вперед), пока процессы заняты вычислениями.
+
+    Args:
+        chunks (iterable): Порции исходных данных (bytes).
+        size (int): Общая длина исходных данных (записывается в заголовок).
+        p (int): Простое число (модуль), p > 256.
+        c_a, d_a (int): Ключи Алисы.
+        c_b, d_b (int): Ключи Боба.
+        workers (int): Число процессов (0 - все в вызывающем потоке).
+        queue_size (int): Размер очереди чтения и запас порций в работе.
+
+    Yields:
+        bytes: Порции расшифрованных данных.
+    """
+    block_size, cipher_block_size = shamir_block_sizes(p)
+    passes = ((c_a, block_size, cipher_block_size),
+              (c_b, cipher_block_size, cipher_block_size),
+              (d_a, cipher_block_size, cipher_block_size),
+              (d_b, cipher_block_size, block_size))
+    stage = _packed_chunks(chunks, size, block_size)
+    if workers:
+        stage = _in_processes(_in_worker(stage, queue_size), p, passes, workers, queue_size)
+    else:
+        for key, size_in, size_out in passes:
+            stage = _transform_chunks(stage, p, key, size_in, size_out)
+    return _unpacked_chunks(stage)
+
+
+
+def shamir_pipeline_file(input_path, output_path, p, c_a, d_a, c_b, d_b, workers=0):
+    """
+    shamir_pipeline для файла: исходный файл читается и результат
+    записывается по одному разу, без временных файлов.
+    """
+    try:
+        with open(input_path, 'rb') as f_in, open(output_path, 'wb') as f_out:
+            size = os.fstat(f_in.fileno()).st_size
+            for out in shamir_pipeline(block_codec.read_chunks(f_in, 1), size, p, c_a, d_a, c_b, d_b, workers):
+                f_out.write(out)
         return True
     except FileNotFoundError:
         print(f"Ошибка: Файл не найден по пути {input_path}")
@@ -73,7 +391,6 @@ def demo_shamir():
     """
     Единый процесс демонстрации протокола Шамира
     """
-    BLOCK_SIZE = 2
 
     print("\n" + "=" * 50)
     print("Демонстрация протокола Шамира (полный цикл)")
@@ -99,9 +416,9 @@ def demo_shamir():
     
     try:
         if param_choice == '1':
-            p = int(input(f"Введите простое p ({256**1} < p < {256**BLOCK_SIZE}): "))
-            if p <= 255:
-                print("Ошибка: p должно быть больше 255.")
+            p = int(input("Введите простое p (p > 256, размер блока определяется по p): "))
+            if p <= 256:
+                print("Ошибка: p должно быть больше 256.")
                 return
             c_a = int(input("Введите ключ Алисы C_a: "))
             c_b = int(input("Введите ключ Боба C_b: "))
@@ -109,21 +426,39 @@ def demo_shamir():
             d_a = cl.mod_inverse(c_a, phi)
             d_b = cl.mod_inverse(c_b, phi)
         elif param_choice == '2':
+            block_size = int(input("Размер блока открытого текста в байтах (1 - побайтово): ") or 1)
+            if block_size < 1:
+                print("Ошибка: размер блока должен быть не меньше 1.")
+                return
             print("\nГенерация параметров...")
-            p, c_a, d_a, c_b, d_b = shamir_generate_params(max_p=(256**BLOCK_SIZE - 1))
+            p, c_a, d_a, c_b, d_b = shamir_generate_params(256**block_size + 1, 256**(block_size + 1) - 1)
         else:
             print("Неверный выбор!")
             return
+
+        block_size, cipher_block_size = shamir_block_sizes(p)
             
         print("\n--- Сгенерированные параметры ---")
         print(f"p = {p}")
         print(f"Ключи Алисы: C_a={c_a}, D_a={d_a}")
         print(f"Ключи Боба: C_b={c_b}, D_b={d_b}")
+        print(f"Блок: {block_size} байт открытого текста -> {cipher_block_size} байт шифротекста")
 
     except Exception as e:
         print(f"Ошибка при обработке параметров: {e}")
         return
 
+    print("\nВыберите режим обмена:")
+    print("1 - Через файлы (четыре прохода с промежуточными файлами)")
+    print("2 - Конвейер в памяти (порции обрабатываются параллельно в процессах)")
+    mode_choice = input("Ваш выбор: ")
+
+    if mode_choice == '2':
+        print("\n--- НАЧАЛО ШИФРОВАНИЯ/РАСШИФРОВАНИЯ (конвейер) ---")
+        if shamir_pipeline_file(input_file, decrypted_file, p, c_a, d_a, c_b, d_b, workers=os.cpu_count() or 1):
+            print(f"\nПроцесс завершен. Финальный файл сохранен как '{decrypted_file}'")
+        return
+
     temp_file1 = decrypted_file + ".temp1"
     temp_file2 = decrypted_file + ".temp2"
     encrypted_file = decrypted_file + ".encrypted"
@@ -132,16 +467,16 @@ def demo_shamir():
     
     print("\n--- НАЧАЛО ШИФРОВАНИЯ/РАСШИФРОВАНИЯ ---")
     print(f"1. Алиса шифрует '{input_file}' ключом C_a...")
-    shamir_process_file(input_file, temp_file1, p, c_a, 1, BLOCK_SIZE)
+    shamir_pack_file(input_file, temp_file1, p, c_a)
     
     print(f"2. Боб шифрует полученный файл ключом C_b...")
-    shamir_process_file(temp_file1, temp_file2, p, c_b, BLOCK_SIZE, BLOCK_SIZE)
+    shamir_process_file(temp_file1, temp_file2, p, c_b, cipher_block_size, cipher_block_size)
 
     print(f"3. Алиса расшифровывает своим ключом D_a...")
-    shamir_process_file(temp_file2, encrypted_file, p, d_a, BLOCK_SIZE, BLOCK_SIZE)
+    shamir_process_file(temp_file2, encrypted_file, p, d_a, cipher_block_size, cipher_block_size)
 
     print(f"4. Боб расшифровывает '{encrypted_file}' своим ключом D_b...")
-    shamir_process_file(encrypted_file, decrypted_file, p, d_b, BLOCK_SIZE, 1)
+    shamir_unpack_file(encrypted_file, decrypted_file, p, d_b)
 
     print(f"\nПроцесс завершен. Финальный файл сохранен как '{decrypted_file}'")
 
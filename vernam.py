@@ -2,6 +2,7 @@ import crypt_lib as cl
 import math
 import os
 
+import block_codec
 import diffie_hellman
 
 def vernam_process_file(input_path, output_path, key, block_size_in, block_size_out, original_size=None):
@@ -16,33 +17,8 @@ def vernam_process_file(input_path, output_path, key, block_size_in, block_size_
         block_size_out (int): Размер блока для записи (в байтах).
     """
     try:
-        with open(input_path, 'rb') as f_in, open(output_path, 'wb') as f_out:
-
-            bytes_written = 0
-
-            while True:
-                block = f_in.read(block_size_in)
-                if not block:
-                    break
-                
-                m = int.from_bytes(block, byteorder='big')
-
-                e = m ^ key
-
-                if original_size is not None:
-                    remaining_bytes = original_size - bytes_written
-                    bytes_to_write_count = min(block_size_out, remaining_bytes)
-                else:
-                    bytes_to_write_count = block_size_out
-
-                processed_block = e.to_bytes(block_size_out, byteorder='big')
-
-                if original_size is not None:
-                    f_out.write(processed_block[-bytes_to_write_count:])
-                    bytes_written += bytes_to_write_count
-                else:
-                    f_out.write(processed_block)
-        
+        block_codec.process_file(input_path, output_path, block_size_in, block_size_out,
+                                 lambda values: [m ^ key for m in values], original_size)
         return True
 
     except FileNotFoundError: